@@ -0,0 +1,492 @@
+"""Headless benchmarks for the ghost search algorithms (no pygame needed).
+
+    python bench.py trials [--sizes 20 50 100] [--trials 1000] [--workers N] [--out results.jsonl]
+    python bench.py replan [--sizes 100 200] [--ticks 300] [--seed 0]
+    python bench.py cooperative [--levels 5 6] [--games 50] [--size 20] [--ticks 300]
+    python bench.py wavefront [--sizes 500 2000] [--seed 0]
+    python bench.py hpa [--sizes 300 1000] [--pairs 20] [--seed 0]
+    python bench.py regress [--save baseline.json | --baseline baseline.json] [--tolerance 0.1]
+
+`python main.py --bench ...` is the same as `python bench.py trials ...`.
+"""
+import argparse
+import csv
+import functools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+import tracemalloc
+from events import EventLog
+from maze import Maze
+from simulator import Simulator, ACTIONS
+from hpa import HierarchicalPlanner
+from ghosts import SearchStats, bfs, dfs, ucs, a_star, a_star_alt, bidirectional_bfs, jps, IncrementalAStar, follow_field
+
+# Algorithms compared by the trials and by `python main.py --test` (see test_algorithms)
+ALGORITHMS = {
+    'BFS': bfs,
+    'DFS': dfs,
+    'UCS': ucs,
+    'A*': a_star,
+    'A* ALT': a_star_alt,
+    'Bi-BFS': bidirectional_bfs,
+    'JPS': jps,
+    'HPA*': HierarchicalPlanner()
+}
+# Different mazes per size, so trials do not all share one layout
+MAZES_PER_SIZE = 10
+
+# Regression suite: every search in ghosts.py on every size and wall density
+REGRESSION_ALGORITHMS = dict(ALGORITHMS, **{
+    'Inc A*': IncrementalAStar,  # A fresh planner per search (class, not instance)
+    'Field': follow_field
+})
+REGRESSION_SIZES = [20, 100, 300, 1000]
+REGRESSION_DENSITIES = [0.1, 0.2, 0.35]
+REGRESSION_PAIRS = 3
+# tracemalloc slows searches down about tenfold, so peak memory is only
+# traced up to this size; peak_visited (nodes held) is recorded at every size
+REGRESSION_TRACE_MAX_SIZE = 300
+# Each search is run once untimed, then timed up to this many times (stopping
+# early after REGRESSION_TIME_BUDGET seconds of timed runs); the fastest run counts
+REGRESSION_REPEATS = 5
+REGRESSION_TIME_BUDGET = 0.3
+# Metrics where larger is worse; optimality is path length / shortest length
+REGRESSION_METRICS = ['time_ms', 'expanded_nodes', 'peak_visited', 'peak_kb', 'optimality']
+
+def test_algorithms():
+    """A copy of ALGORITHMS with its own HierarchicalPlanner, which keeps state per maze"""
+    return dict(ALGORITHMS, **{'HPA*': HierarchicalPlanner()})
+
+def prepare_algorithms(maze, algorithms):
+    """Build landmarks and HPA* entrances once per maze, outside the timed searches."""
+    maze.landmark_tables()
+    for algorithm in algorithms.values():
+        if isinstance(algorithm, HierarchicalPlanner):
+            algorithm.sync(maze)
+
+@functools.lru_cache(maxsize=MAZES_PER_SIZE)
+def cached_maze(size, seed):
+    """Each worker process builds a given maze once and reuses it for all its trials.
+
+    The maze comes with its own algorithm table (test_algorithms), so its
+    HierarchicalPlanner keeps that maze's cluster distances between trials
+    instead of rebuilding them whenever the trials switch mazes.
+    """
+    return Maze(size, size, seed=seed), test_algorithms()
+
+def trial_tasks(sizes, trials, seed=0):
+    """(size, maze seed, trial seed) for every trial; fixed by seed, independent of the worker count"""
+    for size in sizes:
+        for trial in range(trials):
+            maze_seed = seed * 1_000_003 + size * 1_009 + trial % MAZES_PER_SIZE
+            yield size, maze_seed, f"{seed}:{size}:{trial}"
+
+def run_trial(task):
+    """Run every algorithm on one seeded (start, goal) pair; returns one result row per algorithm"""
+    size, maze_seed, trial_seed = task
+    maze, algorithms = cached_maze(size, maze_seed)
+    rng = random.Random(trial_seed)
+    start, goal = maze.random_reachable_pair((maze.width + maze.height) // 3, rng)
+
+    prepare_algorithms(maze, algorithms)
+
+    rows = []
+    for name, algorithm in algorithms.items():
+        stats = SearchStats()
+        start_time = time.perf_counter_ns()
+        path = algorithm(maze, start, goal, stats=stats)
+        elapsed_ns = time.perf_counter_ns() - start_time
+        rows.append({
+            'size': size,
+            'maze_seed': maze_seed,
+            'trial': trial_seed,
+            'start': start,
+            'goal': goal,
+            'algorithm': name,
+            'time_ms': elapsed_ns / 1e6,
+            'path_length': len(path) if path else 0,
+            'expanded_nodes': stats.expansions,
+            'pushes': stats.pushes,
+            'repushes': stats.repushes,
+            'peak_frontier': stats.peak_frontier,
+            'peak_visited': stats.peak_visited,
+            'success': path is not None
+        })
+    return rows
+
+def run_trials(sizes, trials, seed=0, workers=None, out=None):
+    """Spread trials over a process pool, stream rows to out (.jsonl or .csv) and return a summary"""
+    tasks = list(trial_tasks(sizes, trials, seed))
+    summary = {}
+    writer = None
+    out_file = open(out, 'w', newline='') if out else None
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            for rows in pool.imap(run_trial, tasks, chunksize=max(1, len(tasks) // (32 * (workers or os.cpu_count())))):
+                for row in rows:
+                    if out_file and out.endswith('.csv'):
+                        if writer is None:
+                            writer = csv.DictWriter(out_file, fieldnames=list(row))
+                            writer.writeheader()
+                        writer.writerow(row)
+                    elif out_file:
+                        out_file.write(json.dumps(row) + "\n")
+                    totals = summary.setdefault((row['size'], row['algorithm']), [0, 0.0, 0, 0])
+                    totals[0] += 1
+                    totals[1] += row['time_ms']
+                    totals[2] += row['expanded_nodes']
+                    totals[3] += row['path_length']
+    finally:
+        if out_file:
+            out_file.close()
+    return summary
+
+def benchmark_replanning(size, ticks=300, seed=0):
+    """Chase a randomly walking Pac-Man and replan every tick with a_star and IncrementalAStar.
+
+    Returns total expansions and time for both planners; the paths are
+    checked to be identical on every replan.
+    """
+    maze = Maze(size, size, seed=seed)
+    rng = random.Random(seed)
+    planner = IncrementalAStar()
+    pacman = maze.pacman_spawn
+    # Start the ghost on the reachable cell farthest from Pac-Man
+    dist = maze.distance_field(pacman)
+    spawn = maze.cell_position(max(range(len(dist)), key=dist.__getitem__))
+    ghost = spawn
+    totals = {'a_star': [0, 0.0], 'incremental': [0, 0.0]}
+
+    for tick in range(ticks):
+        moves = maze.get_valid_moves(pacman)
+        if moves:
+            pacman = rng.choice(moves)
+
+        paths = {}
+        for name, algorithm in (('a_star', a_star), ('incremental', planner)):
+            stats = SearchStats()
+            start_time = time.perf_counter_ns()
+            paths[name] = algorithm(maze, ghost, pacman, stats=stats)
+            totals[name][0] += stats.expansions
+            totals[name][1] += (time.perf_counter_ns() - start_time) / 1e9
+
+        fresh, incremental = paths['a_star'], paths['incremental']
+        assert fresh == incremental, f"IncrementalAStar differs from a_star at tick {tick}"
+
+        # The ghost moves every other tick, like the slower ghosts in the game,
+        # and restarts from its spawn when it catches Pac-Man
+        if tick % 2 and incremental and len(incremental) > 1:
+            ghost = incremental[1]
+        if ghost == pacman:
+            ghost = spawn
+
+    return totals
+
+def benchmark_cooperative(level, games=50, size=20, ticks=300, seed=0):
+    """Play seeded games with independent ghosts and with CooperativePlanner.
+
+    Pac-Man walks randomly in level 6 and stays put in level 5. Returns, per
+    mode, the ghost event counters summed over all games (replans, blocked
+    moves, ...), the number of games the ghosts won and the ticks they took.
+    """
+    results = {}
+    for cooperative in (False, True):
+        events = EventLog(capacity=1, level=float('inf'))  # Counters only
+        sim = Simulator(level, size, size, shared_field=False, events=events, cooperative=cooperative)
+        caught = total_ticks = 0
+        for game in range(games):
+            sim.reset(seed * 1_000_003 + game)
+            rng = random.Random(game)
+            done = False
+            while not done and sim.ticks < ticks:
+                action = rng.choice(ACTIONS) if sim.pacman_controlled else None
+                _, _, done = sim.step(action)
+            caught += done
+            total_ticks += sim.ticks
+        results['cooperative' if cooperative else 'independent'] = (events.counters, caught, total_ticks)
+    return results
+
+def benchmark_wavefront(size, seed=0):
+    """Time bfs against the vectorized distance map plus path extraction, corner to corner.
+
+    Returns (bfs seconds, wavefront seconds, path length); the neighbor index
+    bfs uses is built before timing.
+    """
+    maze = Maze(size, size, seed=seed)
+    start, goal = (1, 1), (size - 2, size - 2)
+    maze.adjacency()
+    start_time = time.perf_counter()
+    path = bfs(maze, start, goal)
+    bfs_time = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    fast_path = maze.path_to(maze.distance_map(start), goal)
+    wavefront_time = time.perf_counter() - start_time
+    assert (path is None) == (fast_path is None) and (path is None or len(path) == len(fast_path))
+    return bfs_time, wavefront_time, len(path) if path else 0
+
+def benchmark_hierarchical(size, pairs=20, seed=0):
+    """Compare a_star with a ghost's HPA* replan (first segment only) on seeded far-apart pairs.
+
+    HPA* computes the distances inside a cluster the first time a search
+    enters it, so its pairs are run twice: "cold" with those distances being
+    built, "warm" once they are cached, as in a chase after the first replans.
+    Returns a dict of totals: build and local update time of the abstraction,
+    and expansions, cells reached by the cluster BFSs, time and path length
+    (full HPA* paths) per search.
+    """
+    maze = Maze(size, size, seed=seed)
+    maze.adjacency()
+    rng = random.Random(seed)
+    cases = [maze.random_reachable_pair(size, rng) for _ in range(pairs)]
+    planner = HierarchicalPlanner(first_segment=True)
+    start_time = time.perf_counter()
+    planner.sync(maze)
+    totals = {'build_s': time.perf_counter() - start_time, 'pairs': pairs}
+
+    for name, algorithm in (('a_star', a_star), ('hpa cold', planner), ('hpa warm', planner)):
+        expanded, cluster_cells, elapsed = 0, 0, 0.0
+        for start, goal in cases:
+            stats = SearchStats()
+            start_time = time.perf_counter_ns()
+            algorithm(maze, start, goal, stats=stats)
+            elapsed += (time.perf_counter_ns() - start_time) / 1e9
+            expanded += stats.expansions
+            cluster_cells += stats.cluster_cells
+        totals[name] = [expanded, cluster_cells, elapsed, 0]
+    full = HierarchicalPlanner()
+    for start, goal in cases:
+        totals['a_star'][3] += len(a_star(maze, start, goal))
+        totals['hpa warm'][3] += len(full(maze, start, goal))
+    totals['hpa cold'][3] = totals['hpa warm'][3]
+
+    # Close one open cell: only the clusters around it are scanned again
+    maze.set_wall(cases[0][0])
+    start_time = time.perf_counter()
+    planner.sync(maze)
+    totals['update_s'] = time.perf_counter() - start_time
+    return totals
+
+def regression_tasks(sizes, densities, pairs, seed=0, trace_max_size=REGRESSION_TRACE_MAX_SIZE):
+    """(size, wall density, maze seed, pair seed, trace memory) for every pair of the suite"""
+    for size in sizes:
+        for density in densities:
+            maze_seed = seed * 1_000_003 + size * 1_009 + round(density * 100)
+            for pair in range(pairs):
+                yield size, density, maze_seed, f"{maze_seed}:{pair}", size <= trace_max_size
+
+def run_regression_task(task):
+    """Run every algorithm on one (start, goal) pair: a warm-up, the timed repeats, one traced run for memory"""
+    size, density, maze_seed, pair_seed, trace = task
+    maze = Maze(size, size, seed=maze_seed, wall_chance=density)
+    start, goal = maze.random_reachable_pair((maze.width + maze.height) // 3, random.Random(pair_seed))
+    shortest = len(maze.path_to(maze.distance_map(start), goal))
+
+    def prepare(maze, algorithm):
+        maze.grid_changed()
+        maze.adjacency()
+        maze.open_cells()
+        if algorithm is a_star_alt:
+            maze.landmark_tables()
+        elif isinstance(algorithm, HierarchicalPlanner):
+            algorithm.sync(maze)
+
+    rows = []
+    for name, algorithm in REGRESSION_ALGORITHMS.items():
+        make = algorithm if algorithm is IncrementalAStar else (lambda algorithm=algorithm: algorithm)
+        # The distance field is cached on the maze; every run starts without it,
+        # but with the neighbor index, open-cell flags, landmarks and HPA* entrances
+        # already built (HPA* cluster distances are still computed on first use)
+        prepare(maze, algorithm)
+        stats = SearchStats()
+        path = make()(maze, start, goal, stats=stats)
+        # A single cold run of a millisecond search is mostly noise
+        timings = []
+        while len(timings) < REGRESSION_REPEATS and sum(timings) < REGRESSION_TIME_BUDGET * 1e9:
+            prepare(maze, algorithm)
+            search = make()
+            start_time = time.perf_counter_ns()
+            search(maze, start, goal)
+            timings.append(time.perf_counter_ns() - start_time)
+        elapsed_ns = min(timings)
+
+        peak_kb = None
+        if trace:
+            prepare(maze, algorithm)
+            search = make()
+            tracemalloc.start()
+            search(maze, start, goal)
+            peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+        rows.append({
+            'key': f"{size}/{density}/{name}",
+            'time_ms': elapsed_ns / 1e6,
+            'expanded_nodes': stats.expansions,
+            'peak_visited': stats.peak_visited,
+            'peak_kb': peak_kb,
+            'optimality': len(path) / shortest if path else float('inf')
+        })
+    return rows
+
+def run_regression(sizes, densities, pairs, seed=0, workers=None, trace_max_size=REGRESSION_TRACE_MAX_SIZE):
+    """Run the suite over a process pool; returns {size/density/algorithm: metrics}.
+
+    Times and expansions are summed over the pairs, memory and optimality
+    are the worst pair's. peak_kb is None for sizes above trace_max_size.
+    """
+    results = {}
+    tasks = list(regression_tasks(sizes, densities, pairs, seed, trace_max_size))
+    with multiprocessing.Pool(workers) as pool:
+        for rows in pool.imap_unordered(run_regression_task, tasks):
+            for row in rows:
+                totals = results.setdefault(row['key'], dict.fromkeys(REGRESSION_METRICS, 0))
+                totals['time_ms'] += row['time_ms']
+                totals['expanded_nodes'] += row['expanded_nodes']
+                totals['peak_visited'] = max(totals['peak_visited'], row['peak_visited'])
+                totals['peak_kb'] = row['peak_kb'] and max(totals['peak_kb'], row['peak_kb'])
+                totals['optimality'] = max(totals['optimality'], row['optimality'])
+    return dict(sorted(results.items(), key=lambda item: [int(item[0].split('/')[0]), item[0]]))
+
+def compare_to_baseline(results, baseline, tolerance, time_tolerance):
+    """Regressions as (key, metric, baseline value, new value): metrics more than tolerance worse.
+
+    Times are only compared with a time_tolerance: even the fastest of
+    several runs varies by tens of percent on a shared machine, so by
+    default the gate is on the deterministic metrics alone. A key on one
+    side only is a regression with metric None and None for the missing
+    side; so is a metric measured on one side only.
+    """
+    regressions = []
+    for key in [*results, *(key for key in baseline if key not in results)]:
+        old, metrics = baseline.get(key), results.get(key)
+        if old is None or metrics is None:
+            regressions.append((key, None, old, metrics))
+            continue
+        for metric in REGRESSION_METRICS:
+            allowed = time_tolerance if metric == 'time_ms' else tolerance
+            if allowed is None:
+                continue
+            if (old.get(metric) is None) != (metrics[metric] is None):
+                regressions.append((key, metric, old.get(metric), metrics[metric]))
+            elif metrics[metric] is not None and metrics[metric] > old[metric] * (1 + allowed):
+                regressions.append((key, metric, old[metric], metrics[metric]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless search benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+    trials = sub.add_parser('trials', help="seeded (start, goal) trials over a process pool")
+    trials.add_argument('--sizes', type=int, nargs='+', default=[20, 50, 100])
+    trials.add_argument('--trials', type=int, default=1000, help="trials per maze size")
+    trials.add_argument('--seed', type=int, default=0)
+    trials.add_argument('--workers', type=int, default=None, help="processes (default: all cores)")
+    trials.add_argument('--out', default=None, help="per-trial results, .jsonl or .csv")
+    replan = sub.add_parser('replan', help="expansions per replan: a_star vs IncrementalAStar")
+    replan.add_argument('--sizes', type=int, nargs='+', default=[100, 200])
+    replan.add_argument('--ticks', type=int, default=300)
+    replan.add_argument('--seed', type=int, default=0)
+    cooperative = sub.add_parser('cooperative', help="ghost replans and blocked moves: independent vs CooperativePlanner")
+    cooperative.add_argument('--levels', type=int, nargs='+', default=[5, 6])
+    cooperative.add_argument('--games', type=int, default=50)
+    cooperative.add_argument('--size', type=int, default=20)
+    cooperative.add_argument('--ticks', type=int, default=300, help="tick limit per game")
+    cooperative.add_argument('--seed', type=int, default=0)
+    wavefront = sub.add_parser('wavefront', help="bfs vs the vectorized BFS distance map on large mazes")
+    wavefront.add_argument('--sizes', type=int, nargs='+', default=[500, 2000])
+    wavefront.add_argument('--seed', type=int, default=0)
+    hpa = sub.add_parser('hpa', help="a_star vs HPA* replans on large mazes")
+    hpa.add_argument('--sizes', type=int, nargs='+', default=[300, 1000])
+    hpa.add_argument('--pairs', type=int, default=20)
+    hpa.add_argument('--seed', type=int, default=0)
+    regress = sub.add_parser('regress', help="fixed-seed suite over sizes, wall densities and algorithms")
+    regress.add_argument('--sizes', type=int, nargs='+', default=REGRESSION_SIZES)
+    regress.add_argument('--densities', type=float, nargs='+', default=REGRESSION_DENSITIES)
+    regress.add_argument('--pairs', type=int, default=REGRESSION_PAIRS, help="(start, goal) pairs per maze")
+    regress.add_argument('--seed', type=int, default=0)
+    regress.add_argument('--workers', type=int, default=None, help="processes (default: all cores)")
+    regress.add_argument('--trace-max-size', type=int, default=REGRESSION_TRACE_MAX_SIZE,
+                         help="largest maze size whose peak memory is traced")
+    regress.add_argument('--save', default=None, help="write the results as the new baseline JSON")
+    regress.add_argument('--baseline', default=None, help="baseline JSON to compare against")
+    regress.add_argument('--tolerance', type=float, default=0.1,
+                         help="allowed relative increase of expansions, memory and optimality")
+    regress.add_argument('--time-tolerance', type=float, default=None,
+                         help="allowed relative increase of time (default: times are not compared)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'trials':
+        start_time = time.perf_counter()
+        summary = run_trials(args.sizes, args.trials, args.seed, args.workers, args.out)
+        print("Size | Algorithm | Trials | Avg Time (ms) | Avg Expanded | Avg Len")
+        for (size, name), (count, time_ms, expanded, length) in sorted(summary.items()):
+            print(f"{size:4} | {name:<9} | {count:6} | {time_ms / count:13.3f} | "
+                  f"{expanded / count:12.1f} | {length / count:7.2f}")
+        print(f"{len(args.sizes) * args.trials} trials in {time.perf_counter() - start_time:.1f} s")
+    elif args.command == 'replan':
+        print("Size | Planner     | Expanded/replan | Time/replan (ms)")
+        for size in args.sizes:
+            totals = benchmark_replanning(size, args.ticks, args.seed)
+            for name, (expanded, elapsed) in totals.items():
+                print(f"{size:4} | {name:<11} | {expanded / args.ticks:15.1f} | "
+                      f"{elapsed * 1000 / args.ticks:16.3f}")
+    elif args.command == 'cooperative':
+        print("Level | Ghosts      | Replans | Blocked | Alt moves | Random | Caught | Avg ticks")
+        for level in args.levels:
+            results = benchmark_cooperative(level, args.games, args.size, args.ticks, args.seed)
+            for name, (counters, caught, ticks) in results.items():
+                print(f"{level:5} | {name:<11} | {counters['replan']:7} | {counters['blocked']:7} | "
+                      f"{counters['alternative_move']:9} | {counters['random_move']:6} | "
+                      f"{caught:3}/{args.games:<3}| {ticks / args.games:9.1f}")
+    elif args.command == 'wavefront':
+        print("Size | bfs (ms) | Wavefront (ms) | Speedup | Path Len")
+        for size in args.sizes:
+            bfs_time, wavefront_time, length = benchmark_wavefront(size, args.seed)
+            print(f"{size:4} | {bfs_time * 1000:8.1f} | {wavefront_time * 1000:14.1f} | "
+                  f"{bfs_time / wavefront_time:6.1f}x | {length:8}")
+    elif args.command == 'hpa':
+        print("Size | Build (ms) | Update (ms) | Search   | Expanded/replan | Cluster cells/replan | "
+              "Time/replan (ms) | Avg Len")
+        for size in args.sizes:
+            totals = benchmark_hierarchical(size, args.pairs, args.seed)
+            pairs = totals['pairs']
+            for name in ('a_star', 'hpa cold', 'hpa warm'):
+                expanded, cluster_cells, elapsed, length = totals[name]
+                print(f"{size:4} | {totals['build_s'] * 1000:10.1f} | {totals['update_s'] * 1000:11.2f} | "
+                      f"{name:<8} | {expanded / pairs:15.1f} | {cluster_cells / pairs:20.1f} | "
+                      f"{elapsed * 1000 / pairs:16.2f} | {length / pairs:7.1f}")
+    elif args.command == 'regress':
+        config = {'sizes': args.sizes, 'densities': args.densities, 'pairs': args.pairs, 'seed': args.seed,
+                  'trace_max_size': args.trace_max_size, 'repeats': REGRESSION_REPEATS}
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            # Results of another suite are not comparable key by key
+            if baseline.get('config') != config:
+                parser.error(f"{args.baseline} was saved with {baseline.get('config')}, this run is {config}")
+        results = run_regression(args.sizes, args.densities, args.pairs, args.seed, args.workers,
+                                 args.trace_max_size)
+        print("Size/Density/Algorithm | Time (ms) | Expanded |  Visited | Peak (KB) | Optimality")
+        for key, metrics in results.items():
+            peak_kb = '-' if metrics['peak_kb'] is None else f"{metrics['peak_kb']:.1f}"
+            print(f"{key:<22} | {metrics['time_ms']:9.2f} | {metrics['expanded_nodes']:8} | "
+                  f"{metrics['peak_visited']:8} | {peak_kb:>9} | {metrics['optimality']:10.3f}")
+        if args.save:
+            with open(args.save, 'w') as f:
+                json.dump({'config': config, 'results': results}, f, indent=1)
+        if args.baseline:
+            regressions = compare_to_baseline(results, baseline['results'], args.tolerance, args.time_tolerance)
+            for key, metric, old, new in regressions:
+                if metric is None:
+                    print(f"REGRESSION {key}: {'missing from this run' if new is None else 'not in the baseline'}")
+                else:
+                    old, new = ('-' if value is None else f"{value:.3f}" for value in (old, new))
+                    print(f"REGRESSION {key} {metric}: {old} -> {new}")
+            if regressions:
+                sys.exit(1)
+            print(f"No regressions against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Cooperative planning for a group of ghosts: Windowed Hierarchical Cooperative A* (WHCA*).
+
+All ghosts are planned together in one call. Each ghost runs a space-time A*
+over (cell, tick) states, with waiting as an extra move, against a
+reservation table holding the cells and edges already claimed by the ghosts
+planned before it, so the returned paths never put two ghosts on one cell or
+swap two ghosts through each other. Only `window` ticks are planned; the rest
+of the way is estimated with the maze's shared distance field to the goal
+(the "hierarchical" abstract distance). A ghost is replanned when its goal
+moves, when it left its plan, or when half of a window-limited plan is used.
+"""
+import heapq
+import time
+from events import INFO
+
+class CooperativePlanner:
+    """Plans conflict-free paths for all ghosts of a GhostScheduler.
+
+    The reservation table is kept across ticks (keyed by absolute tick), so
+    a ghost whose plan is still good keeps it and only the ghosts that need a
+    new plan are searched again, against everyone else's reservations. Ghosts
+    closer to their goal are planned first. plan(ghosts) is called once per
+    tick; a path may repeat a position, which means the ghost waits there.
+    """
+    def __init__(self, window=16):
+        self.window = window
+        self.clock = 0  # Absolute tick of the ghosts' current positions
+        self.cells = {}  # (cell, tick) -> ghost holding it
+        self.edges = set()  # (from cell, to cell, tick of arrival)
+        self.held = {}  # ghost -> (cell keys, edge keys) it reserved
+        self.planned_goals = {}  # ghost -> goal of its current plan
+        self.expansions = 0  # States expanded by the last space_time_search
+
+    def needs_replan(self, ghost):
+        """True if the ghost's goal moved, it left its plan or its plan is running out."""
+        if ghost not in self.held or self.planned_goals.get(ghost) != ghost.goal:
+            return True
+        if not ghost.path or ghost.path[0] != ghost.position:
+            return True
+        # A plan ending at the goal stays valid; one cut off by the window is
+        # extended once half of it has been used
+        return ghost.path[-1] != ghost.goal and len(ghost.path) <= self.window // 2
+
+    def release(self, ghost):
+        """Drop everything ghost has reserved."""
+        cells, edges = self.held.pop(ghost, ((), ()))
+        for key in cells:
+            if self.cells.get(key) is ghost:
+                del self.cells[key]
+        self.edges.difference_update(edges)
+
+    def plan(self, ghosts):
+        """Replan the ghosts that need it; returns how many were replanned."""
+        if not ghosts:
+            return 0
+        maze = ghosts[0].maze
+        stale = [ghost for ghost in ghosts if self.needs_replan(ghost)]
+        for ghost in stale:
+            self.release(ghost)
+        position_in_list = {ghost: i for i, ghost in enumerate(ghosts)}
+
+        def priority(ghost):
+            d = maze.distance_field(ghost.goal)[maze.cell_id(ghost.position)]
+            return d if d >= 0 else maze.width * maze.height, position_in_list[ghost]
+
+        for ghost in sorted(stale, key=priority):
+            start = time.perf_counter_ns()
+            path = self.space_time_search(maze, ghost, ghost.position, ghost.goal)
+            if ghost.profiler is not None:
+                ghost.profiler.record_search(ghost.color, start, time.perf_counter_ns(), self.expansions)
+            with ghost.lock:
+                ghost.last_goal = ghost.goal
+                ghost.path = path or []
+            # A ghost without a plan still holds its cell for the window
+            self.reserve(maze, ghost, path or [ghost.position])
+            self.planned_goals[ghost] = ghost.goal
+            if path:
+                ghost.log('replan', INFO, goal=ghost.goal, length=len(path), cooperative=True)
+            else:
+                ghost.log('no_path', INFO, goal=ghost.goal, cooperative=True)
+        self.clock += 1
+        return len(stale)
+
+    def reserve(self, maze, ghost, path):
+        """Claim every (cell, tick) of path for ghost, and its last cell until the window ends."""
+        ids = [maze.cell_id(position) for position in path]
+        cells = [(cell, self.clock + tick) for tick, cell in enumerate(ids)]
+        cells.extend((ids[-1], self.clock + tick) for tick in range(len(ids), self.window + 1))
+        edges = [(ids[tick - 1], ids[tick], self.clock + tick) for tick in range(1, len(ids))]
+        for key in cells:
+            self.cells[key] = ghost
+        self.edges.update(edges)
+        self.held[ghost] = (cells, edges)
+
+    def space_time_search(self, maze, ghost, start, goal):
+        """A* over (cell, tick) for one ghost; returns positions for ticks 0..T or None.
+
+        Stops at the goal or at the window's edge, whichever the ordering on
+        g + distance-to-goal reaches first. Waiting costs a tick like a move.
+        """
+        offsets, indices = maze.adjacency()
+        field = maze.distance_field(goal)
+        start, goal = maze.cell_id(start), maze.cell_id(goal)
+        if field[start] < 0:
+            return None
+        cells, edges, clock = self.cells, self.edges, self.clock
+
+        def free(cell, tick, previous):
+            holder = cells.get((cell, clock + tick))
+            if holder is not None and holder is not ghost:
+                return False
+            # Two ghosts may not swap cells through each other
+            return (cell, previous, clock + tick) not in edges
+
+        parent = {(start, 0): None}
+        # Ties on f go to the state furthest in time, i.e. closest to the goal
+        heap = [(field[start], 0, start)]
+        end = None
+        self.expansions = 0
+        while heap:
+            _, tick, cell = heapq.heappop(heap)
+            tick = -tick
+            self.expansions += 1
+            if cell == goal or tick == self.window:
+                end = (cell, tick)
+                break
+            for neighbor in (cell, *indices[offsets[cell]:offsets[cell + 1]]):
+                state = (neighbor, tick + 1)
+                if state in parent or field[neighbor] < 0 or not free(neighbor, tick + 1, cell):
+                    continue
+                parent[state] = (cell, tick)
+                heapq.heappush(heap, (tick + 1 + field[neighbor], -tick - 1, neighbor))
+        if end is None:
+            return None
+
+        path = []
+        state = end
+        while state is not None:
+            path.append(maze.cell_position(state[0]))
+            state = parent[state]
+        return path[::-1]
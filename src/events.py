@@ -0,0 +1,106 @@
+"""In-memory event log for the ghosts, flushed to JSON Lines on demand or from a background thread.
+
+Events go into a fixed-size ring buffer; every event kind is also counted,
+so totals (replans, blocked moves, random moves, ...) stay exact even when
+old events have been overwritten or rate-limited away.
+
+    events = EventLog()
+    events.start_writer("events.jsonl")   # optional, flushes every second
+    ...
+    events.close()
+    print(events.counters)
+"""
+import json
+import threading
+import time
+from collections import Counter, deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+LEVEL_NAMES = {DEBUG: 'debug', INFO: 'info', WARNING: 'warning'}
+
+class EventLog:
+    """Ring buffer of structured events with levels, per-kind counters and a rate limit.
+
+    Only events at or above level are stored, and at most rate_limit events
+    of one kind per second (None for no limit); the rest are only counted.
+    With echo, stored events are also printed to the console. debug_paths
+    tells the ghosts to attach full paths to their replan events.
+    """
+    def __init__(self, capacity=4096, level=INFO, rate_limit=50, echo=False, debug_paths=False):
+        self.events = deque(maxlen=capacity)
+        self.level = level
+        self.rate_limit = rate_limit
+        self.echo = echo
+        self.debug_paths = debug_paths
+        self.counters = Counter()
+        self.suppressed = 0  # Below level or over the rate limit
+        self.dropped = 0     # Overwritten in the ring buffer before a flush
+        self.windows = {}    # kind -> [second, events stored in that second]
+        self.lock = threading.Lock()
+        self.writer = None
+        self.writer_stop = threading.Event()
+
+    def emit(self, kind, source=None, level=INFO, **fields):
+        """Count an event and store it unless it is filtered out; returns True if stored."""
+        with self.lock:
+            self.counters[kind] += 1
+            if level < self.level:
+                self.suppressed += 1
+                return False
+            now = time.monotonic()
+            if self.rate_limit is not None:
+                window = self.windows.setdefault(kind, [int(now), 0])
+                if window[0] != int(now):
+                    window[0], window[1] = int(now), 0
+                if window[1] >= self.rate_limit:
+                    self.suppressed += 1
+                    return False
+                window[1] += 1
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            event = {'time': now, 'level': LEVEL_NAMES.get(level, level), 'kind': kind, 'source': source}
+            event.update(fields)
+            self.events.append(event)
+        if self.echo:
+            details = ' '.join(f"{key}={value}" for key, value in fields.items())
+            print(f"[{event['level']}] {source}: {kind} {details}")
+        return True
+
+    def drain(self):
+        """Remove and return all buffered events, oldest first."""
+        with self.lock:
+            events = list(self.events)
+            self.events.clear()
+        return events
+
+    def flush(self, path):
+        """Append all buffered events to a JSON Lines file; returns how many were written."""
+        events = self.drain()
+        if events:
+            with open(path, 'a') as sink:
+                for event in events:
+                    sink.write(json.dumps(event, default=str) + "\n")
+        return len(events)
+
+    def start_writer(self, path, interval=1.0):
+        """Flush to path every interval seconds from a daemon thread until close()."""
+        def write():
+            while not self.writer_stop.wait(interval):
+                self.flush(path)
+            self.flush(path)
+        self.writer_stop.clear()
+        self.writer = threading.Thread(target=write, daemon=True)
+        self.writer.start()
+
+    def close(self):
+        """Stop the background writer after a final flush."""
+        if self.writer is not None:
+            self.writer_stop.set()
+            self.writer.join()
+            self.writer = None
+
+    def summary(self):
+        """Counters plus how many events were suppressed or dropped."""
+        return dict(self.counters, suppressed=self.suppressed, dropped=self.dropped)
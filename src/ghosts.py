@@ -2,7 +2,10 @@ import heapq
 import threading
 import time
 import random
-from collections import deque
+from array import array
+from collections import OrderedDict, deque
+from events import DEBUG, INFO, WARNING
+from maze import DIRECTIONS
 
 class Ghost(threading.Thread):
     def __init__(self, maze, start, goal, algorithm, color, ghosts=None):
@@ -18,77 +21,147 @@ class Ghost(threading.Thread):
         self.daemon = True
         self.last_goal = None
         self.lock = threading.Lock()  # Tránh conflict đa luồng
+        self.rng = random  # GhostScheduler thay bằng một random.Random có seed
+        self.tick = 0.3  # Thời gian giữa hai bước khi chạy bằng luồng riêng
+        self.events = None  # EventLog nhận các sự kiện của con ma (None: không ghi)
+        self.occupancy = None  # OccupancyGrid dùng chung (None: quét danh sách ghosts như cũ)
+        self.profiler = None  # Profiler đo thời gian và số nút mở rộng của mỗi lần tìm đường (None: không đo)
+
+    def log(self, kind, level=DEBUG, **fields):
+        """Ghi một sự kiện có cấu trúc vào EventLog (không định dạng chuỗi, không in ra console)."""
+        if self.events is not None:
+            self.events.emit(kind, self.color, level, **fields)
 
     def is_position_occupied(self, position):
-        """Kiểm tra xem vị trí có bị ma quỷ khác chiếm không."""
+        """Kiểm tra xem vị trí có bị ma quỷ khác chiếm (hoặc đặt trước) không."""
+        if self.occupancy is not None:
+            if self.occupancy.is_free(self, position):
+                return False
+            self.log('occupied', position=position)
+            return True
         if self.ghosts is None:
             return False
         for other_ghost in self.ghosts:
             if other_ghost != self:
                 with other_ghost.lock:  # Khóa trên đối tượng khác
                     if other_ghost.position == position:
-                        print(f"Ghost {self.color}: Position {position} occupied by {other_ghost.color}")
+                        self.log('occupied', position=position, by=other_ghost.color)
                         return True
         return False
 
-    def run(self):
-        """Luồng chính của ma quỷ: tính đường đi và di chuyển."""
-        while self.running:
-            # Cập nhật đường đi nếu mục tiêu thay đổi hoặc path không còn hợp lệ
+    def claim(self, position):
+        """Chuyển tới position nếu ô đó không phải tường và còn trống; trả về True nếu đã chuyển."""
+        if self.maze.is_wall(position):
+            return False
+        if self.occupancy is not None:
+            # Kiểm tra và cập nhật bảng chiếm chỗ trong một thao tác nguyên tử
             with self.lock:
-                if self.goal != self.last_goal or not self.path:
-                    self.last_goal = self.goal
-                    if self.goal != self.position:
+                if not self.occupancy.move(self, self.position, position):
+                    self.log('occupied', position=position)
+                    return False
+                self.position = position
+            return True
+        if self.is_position_occupied(position):
+            return False
+        with self.lock:
+            self.position = position
+        return True
+
+    def plan(self):
+        """Tính lại đường đi nếu mục tiêu thay đổi hoặc path không còn hợp lệ."""
+        with self.lock:
+            # Đường đi đã hết mà chưa tới đích (ví dụ HPA* chỉ trả về đoạn đầu) cũng phải tính lại
+            if self.goal != self.last_goal or len(self.path) < 2:
+                self.last_goal = self.goal
+                if self.goal != self.position:
+                    if self.profiler is not None:
+                        new_path = self.profiler.search(self.color, self.algorithm, self.maze,
+                                                        self.position, self.goal)
+                    else:
                         new_path = self.algorithm(self.maze, self.position, self.goal)
-                        if new_path and len(new_path) > 1:
-                            self.path = new_path
-                            print(f"Ghost {self.color}: New path calculated to {self.goal}: {self.path}")
+                    if new_path and len(new_path) > 1:
+                        self.path = new_path
+                        # Chỉ ghi toàn bộ đường đi khi bật debug_paths
+                        if self.events is not None and self.events.debug_paths:
+                            self.log('replan', INFO, goal=self.goal, length=len(new_path), path=new_path)
                         else:
-                            self.path = []
-                            print(f"Ghost {self.color}: No valid path to {self.goal}")
+                            self.log('replan', INFO, goal=self.goal, length=len(new_path))
                     else:
                         self.path = []
-                        print(f"Ghost {self.color}: Already at goal {self.goal}")
-
-            # Di chuyển nếu có đường đi
-            moved = False
-            if self.path and len(self.path) > 1:
-                next_pos = self.path[1]
-                if not self.maze.is_wall(next_pos) and not self.is_position_occupied(next_pos):
-                    with self.lock:
-                        self.position = next_pos
-                        self.path = self.path[1:]
-                        moved = True
-                        print(f"Ghost {self.color}: Moved to {self.position}")
+                        self.log('no_path', WARNING, goal=self.goal)
                 else:
-                    print(f"Ghost {self.color}: Cannot move to {next_pos} (wall or occupied)")
-                    # Thử các ô khác trong path nếu có
-                    if len(self.path) > 2:
-                        for i in range(2, min(len(self.path), 4)):  # Kiểm tra tối đa 3 ô tiếp theo
-                            alt_pos = self.path[i]
-                            if not self.maze.is_wall(alt_pos) and not self.is_position_occupied(alt_pos):
-                                with self.lock:
-                                    self.position = alt_pos
-                                    self.path = self.path[i:]
-                                    moved = True
-                                    print(f"Ghost {self.color}: Moved to alternative {self.position}")
-                                    break
-                    if not moved:
-                        self.path = []  # Reset path để tính lại
-
-            # Di chuyển ngẫu nhiên nếu không có đường đi hoặc không di chuyển được
-            if not moved:
-                neighbors = self.maze.get_valid_moves(self.position)
-                valid_neighbors = [n for n in neighbors if not self.is_position_occupied(n)]
-                if valid_neighbors:
-                    with self.lock:
-                        self.position = random.choice(valid_neighbors)
-                        moved = True
-                        print(f"Ghost {self.color}: Random move to {self.position}")
-                else:
-                    print(f"Ghost {self.color}: No valid moves from {self.position}")
+                    self.path = []
+                    self.log('at_goal', goal=self.goal)
+            # Đặt trước ô kế tiếp để hai con ma không nhắm cùng một ô trong một tick
+            if self.occupancy is not None and len(self.path) > 1:
+                self.occupancy.reserve(self, self.path[1])
+
+    def move(self):
+        """Đi một bước theo path; nếu bị chặn thì thử ô khác trong path hoặc đi ngẫu nhiên."""
+        # Di chuyển nếu có đường đi
+        moved = False
+        if self.path and len(self.path) > 1:
+            next_pos = self.path[1]
+            if self.claim(next_pos):
+                with self.lock:
+                    self.path = self.path[1:]
+                moved = True
+                self.log('move', position=next_pos)
+            else:
+                self.log('blocked', INFO, target=next_pos)
+                # Thử các ô khác trong path nếu có
+                if len(self.path) > 2:
+                    for i in range(2, min(len(self.path), 4)):  # Kiểm tra tối đa 3 ô tiếp theo
+                        alt_pos = self.path[i]
+                        if self.claim(alt_pos):
+                            with self.lock:
+                                self.path = self.path[i:]
+                            moved = True
+                            self.log('alternative_move', INFO, position=alt_pos)
+                            break
+                if not moved:
+                    self.path = []  # Reset path để tính lại
+
+        # Di chuyển ngẫu nhiên nếu không có đường đi hoặc không di chuyển được
+        if not moved:
+            neighbors = self.maze.get_valid_moves(self.position)
+            valid_neighbors = [n for n in neighbors if not self.is_position_occupied(n)]
+            if valid_neighbors and self.claim(self.rng.choice(valid_neighbors)):
+                moved = True
+                self.log('random_move', INFO, position=self.position)
+            else:
+                self.log('stuck', WARNING, position=self.position)
+
+        # Bỏ ô đã đặt trước nếu không đi vào đó
+        if self.occupancy is not None:
+            self.occupancy.release(self)
+
+    def follow_plan(self):
+        """Đi đúng một bước theo path do CooperativePlanner lập (ô kế tiếp trùng vị trí hiện tại là đứng chờ).
 
-            time.sleep(0.3)  # Delay để ghost không di chuyển quá nhanh
+        Trả về False nếu không còn path hoặc ô kế tiếp vẫn đang bị chiếm.
+        """
+        if len(self.path) < 2:
+            return False
+        next_pos = self.path[1]
+        waiting = next_pos == self.position
+        if not waiting and not self.claim(next_pos):
+            return False
+        with self.lock:
+            self.path = self.path[1:]
+        self.log('wait' if waiting else 'move', position=next_pos)
+        return True
+
+    def step(self):
+        """Một bước của ma quỷ: tính đường đi rồi di chuyển."""
+        self.plan()
+        self.move()
+
+    def run(self):
+        """Luồng chính của ma quỷ (chế độ đa luồng cũ)."""
+        while self.running:
+            self.step()
+            time.sleep(self.tick)  # Delay để ghost không di chuyển quá nhanh
 
     def update_goal(self, new_goal):
         """Cập nhật mục tiêu mới an toàn."""
@@ -99,98 +172,734 @@ class Ghost(threading.Thread):
         """Dừng thread ghost."""
         self.running = False
 
-# Search Algorithms (giữ nguyên)
-def bfs(maze, start, goal):
-    queue = deque([(start, [start])])
-    visited = set([start])
-    
-    while queue:
-        current, path = queue.popleft()
-        
-        if current == goal:
-            return path
-            
-        for neighbor in maze.get_valid_moves(current):
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append((neighbor, path + [neighbor]))
-    
-    return None
+class GhostScheduler:
+    """Điều khiển tất cả ma quỷ trong một luồng với bước thời gian cố định.
 
-def dfs(maze, start, goal):
-    stack = [(start, None)]
-    parent_map = {start: None}
-    visited = {start}
-    
+    Mỗi tick tính đường đi cho mọi con ma trước, sau đó cho chúng di chuyển lần
+    lượt theo thứ tự trong danh sách, nên kết quả không phụ thuộc vào luồng.
+    Các bước ngẫu nhiên dùng chung một random.Random có seed. Nếu có planner
+    (CooperativePlanner), cả nhóm được lập đường đi chung thay vì từng con tự tìm.
+    """
+    def __init__(self, ghosts, tick=0.3, seed=None, max_ticks_per_step=5, planner=None):
+        self.ghosts = ghosts
+        self.planner = planner
+        self.tick = tick
+        self.max_ticks_per_step = max_ticks_per_step  # Tránh dồn tick khi một khung hình bị chậm
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.rng = random.Random(seed)
+        for ghost in ghosts:
+            ghost.rng = self.rng
+
+    def due_ticks(self, dt):
+        """Cộng dt giây vào bộ tích lũy và trả về số tick cố định đến hạn (người gọi tự chạy tick_once)."""
+        self.accumulator = min(self.accumulator + dt, self.tick * self.max_ticks_per_step)
+        ticks = 0
+        while self.accumulator >= self.tick:
+            self.accumulator -= self.tick
+            ticks += 1
+        return ticks
+
+    def step(self, dt):
+        """Cộng dt giây vào bộ tích lũy và chạy đủ số tick cố định; trả về số tick đã chạy."""
+        ticks = self.due_ticks(dt)
+        for _ in range(ticks):
+            self.tick_once()
+        return ticks
+
+    def alpha(self):
+        """Phần của tick hiện tại đã trôi qua (0..1), dùng để nội suy khi vẽ."""
+        return min(self.accumulator / self.tick, 1.0)
+
+    def tick_once(self):
+        """Một tick: tính đường đi cho cả nhóm rồi di chuyển theo thứ tự cố định."""
+        if self.planner is None:
+            for ghost in self.ghosts:
+                ghost.plan()
+            for ghost in self.ghosts:
+                ghost.move()
+        else:
+            # Các path không va chạm nhưng được lập như thể mọi con ma đi cùng lúc,
+            # nên con nào bị chặn được thử lại sau khi các con khác đã rời ô
+            self.planner.plan(self.ghosts)
+            pending = self.ghosts
+            while pending:
+                blocked = [ghost for ghost in pending if not ghost.follow_plan()]
+                if len(blocked) == len(pending):
+                    break
+                pending = blocked
+            for ghost in pending:
+                ghost.move()
+        self.ticks += 1
+
+class OccupancyGrid:
+    """Bảng chiếm chỗ dùng chung cho mọi con ma trên một mê cung.
+
+    Mỗi ô (theo id của Maze.cell_id) lưu số con ma đang đứng đó, nên kiểm tra
+    một ô chỉ là một lần đọc mảng thay vì khóa và so sánh từng con ma. Ô kế
+    tiếp mà một con ma định đi được đặt trước trong tick, nên hai con ma không
+    thể cùng nhận một ô. Mọi thay đổi đi qua một khóa duy nhất.
+    """
+    def __init__(self, maze, ghosts=()):
+        self.height = maze.height
+        self.counts = array('H', bytes(2 * maze.width * maze.height))
+        self.reserved = {}  # id ô -> con ma đã đặt trước
+        self.reservations = {}  # con ma -> id ô nó đã đặt trước
+        self.lock = threading.Lock()
+        for ghost in ghosts:
+            self.add(ghost.position)
+
+    def add(self, position):
+        """Ghi nhận một con ma mới đứng ở position."""
+        x, y = position
+        with self.lock:
+            self.counts[x * self.height + y] += 1
+
+    def is_free(self, ghost, position):
+        """True nếu không có con ma nào ở position và không con ma nào khác đã đặt trước ô đó."""
+        x, y = position
+        cell = x * self.height + y
+        if self.counts[cell]:
+            return False
+        owner = self.reserved.get(cell)
+        return owner is None or owner is ghost
+
+    def reserve(self, ghost, position):
+        """Đặt trước position cho ghost (bỏ ô đặt trước cũ); trả về False nếu ô đã có chủ."""
+        x, y = position
+        cell = x * self.height + y
+        with self.lock:
+            owner = self.reserved.get(cell)
+            if owner is not None and owner is not ghost:
+                return False
+            self._release(ghost)
+            self.reserved[cell] = ghost
+            self.reservations[ghost] = cell
+            return True
+
+    def release(self, ghost):
+        """Bỏ ô ghost đã đặt trước (nếu có)."""
+        with self.lock:
+            self._release(ghost)
+
+    def _release(self, ghost):
+        cell = self.reservations.pop(ghost, None)
+        if cell is not None and self.reserved.get(cell) is ghost:
+            del self.reserved[cell]
+
+    def move(self, ghost, old, new):
+        """Chuyển ghost từ old sang new nếu new còn trống; kiểm tra và cập nhật là nguyên tử."""
+        old_cell = old[0] * self.height + old[1]
+        new_cell = new[0] * self.height + new[1]
+        with self.lock:
+            owner = self.reserved.get(new_cell)
+            if self.counts[new_cell] or (owner is not None and owner is not ghost):
+                return False
+            self.counts[old_cell] -= 1
+            self.counts[new_cell] += 1
+            self._release(ghost)
+            return True
+
+# Search Algorithms
+# Tất cả thuật toán dùng chung một lõi tìm kiếm trên id số nguyên của ô: mỗi nút
+# chỉ lưu con trỏ cha và chi phí, đường đi chỉ được dựng lại khi tới đích.
+class SearchStats:
+    """Counters filled in by a search function when passed as stats=...
+
+    Most counters are derived from the sizes of the search's own structures
+    when it returns, so an attached observer costs almost nothing and a
+    search without one pays only a few `is None` checks.
+    """
+    def __init__(self, record_expanded=False):
+        self.expansions = 0      # Nodes whose neighbors were generated
+        self.pushes = 0          # Entries added to the frontier
+        self.repushes = 0        # Pushes of a node already on the frontier with a lower cost
+        self.peak_frontier = 0   # Largest queue/stack/heap size
+        self.peak_visited = 0    # Largest number of nodes seen (visited set / cost table)
+        self.cluster_cells = 0   # Cells reached by HPA*'s BFSs inside clusters (not expansions)
+        self.expanded = [] if record_expanded else None  # Expanded positions in order
+
+    def record(self, maze, expansions, pushes, repushes, peak_frontier, peak_visited, expanded_cells=None):
+        """Accumulate the counters of one search (called by the search itself)."""
+        self.expansions += expansions
+        self.pushes += pushes
+        self.repushes += repushes
+        self.peak_frontier = max(self.peak_frontier, peak_frontier)
+        self.peak_visited = max(self.peak_visited, peak_visited)
+        if self.expanded is not None and expanded_cells:
+            self.expanded.extend(maze.cell_position(cell) for cell in expanded_cells)
+
+def _build_path(maze, parent, cell):
+    """Follow parent pointers back from cell and return the path as positions."""
+    path = []
+    while cell is not None:
+        path.append(maze.cell_position(cell))
+        cell = parent[cell]
+    return path[::-1]
+
+def _smallest_path(maze, cost, closed, start, goal):
+    """Lexicographically smallest shortest path from start to goal, as positions.
+
+    Matches the old behaviour of comparing whole path lists on heap ties.
+    cost must be exact for the closed cells and goal, and every cell on a
+    shortest path must be closed, as it is once UCS/A* pops the goal: the
+    cells one move closer are walked back from goal once, then the path is
+    rebuilt from start taking the smallest cell id at every step.
+    """
+    offsets, indices = maze.adjacency()
+    on_path = {goal}
+    stack = [goal]
     while stack:
-        current, _ = stack.pop()
-        
-        if current == goal:
-            path = []
-            while current is not None:
-                path.append(current)
-                current = parent_map[current]
-            return path[::-1]
-        
-        for neighbor in maze.get_valid_moves(current):
-            if neighbor not in visited:
-                visited.add(neighbor)
-                parent_map[neighbor] = current
-                stack.append((neighbor, current))
+        cell = stack.pop()
+        d = cost[cell] - 1
+        for neighbor in indices[offsets[cell]:offsets[cell + 1]]:
+            if neighbor not in on_path and neighbor in closed and cost[neighbor] == d:
+                on_path.add(neighbor)
+                stack.append(neighbor)
     
-    return None
+    cell = start
+    path = [maze.cell_position(cell)]
+    while cell != goal:
+        d = cost[cell] + 1
+        cell = min(neighbor for neighbor in indices[offsets[cell]:offsets[cell + 1]]
+                   if neighbor in on_path and cost[neighbor] == d)
+        path.append(maze.cell_position(cell))
+    return path
 
-def ucs(maze, start, goal):
-    heap = []
-    heapq.heappush(heap, (0, start, [start]))
-    visited = set()
+def _search(maze, start, goal, order, heuristic=None, stats=None):
+    """Shared search core.
+
+    order is 'fifo' (BFS), 'lifo' (DFS) or 'best' (UCS/A* on f = g + h, with
+    heuristic None meaning h = 0, searched by cost levels). parent and cost
+    are dicts keyed by cell id.
+    """
+    offsets, indices = maze.adjacency()
+    start, goal = maze.cell_id(start), maze.cell_id(goal)
+    parent = {start: None}
+    tracking = stats is not None
+    expanded = [] if tracking and stats.expanded is not None else None
+    peak = 1
     
-    while heap:
-        cost, current, path = heapq.heappop(heap)
+    if order != 'best':
+        # BFS/DFS: mark cells when they are pushed, stop when the goal is popped
+        frontier = deque([start]) if order == 'fifo' else [start]
+        pop = frontier.popleft if order == 'fifo' else frontier.pop
+        found = False
+        while frontier:
+            current = pop()
+            if current == goal:
+                found = True
+                break
+            
+            if expanded is not None:
+                expanded.append(current)
+            for neighbor in indices[offsets[current]:offsets[current + 1]]:
+                if neighbor not in parent:
+                    parent[neighbor] = current
+                    frontier.append(neighbor)
+            if tracking and len(frontier) > peak:
+                peak = len(frontier)
         
+        if tracking:
+            # Every push added a parent entry; every pop but the goal's was an expansion
+            pushes = len(parent) - 1
+            pops = pushes + 1 - len(frontier)
+            stats.record(maze, pops - found, pushes, 0, peak, len(parent), expanded)
+        return _build_path(maze, parent, goal) if found else None
+
+    if heuristic is None:
+        # UCS: with unit costs the heap below pops whole cost levels in cell
+        # id order and never repushes, so sorted level lists pop the same cells
+        cost = {start: 0}
+        closed = set()
+        level = [start]
+        g = 0
+        found = False
+        while level and not found:
+            level.sort()
+            g += 1
+            following = []
+            for i, current in enumerate(level):
+                if current == goal:
+                    found = True
+                    break
+                closed.add(current)
+
+                if expanded is not None:
+                    expanded.append(current)
+                for neighbor in indices[offsets[current]:offsets[current + 1]]:
+                    if neighbor not in cost:
+                        cost[neighbor] = g
+                        following.append(neighbor)
+                if tracking and len(level) - i - 1 + len(following) > peak:
+                    peak = len(level) - i - 1 + len(following)
+            level = following
+
+        if tracking:
+            stats.record(maze, len(closed), len(cost) - 1, 0, peak, len(cost), expanded)
+        return _smallest_path(maze, cost, closed, start, goal) if found else None
+
+    # A*: lazy-deletion heap of (f, g, cell), closed once popped; with a
+    # consistent heuristic every cell on a shortest path is closed before the
+    # goal is popped, so the path is picked among them at the end
+    cost = {start: 0}
+    closed = set()
+    heap = [(heuristic(start), 0, start)]
+    repushes = 0
+    found = False
+    while heap:
+        _, g, current = heapq.heappop(heap)
         if current == goal:
-            return path
-            
-        if current in visited:
+            found = True
+            break
+        if current in closed:
             continue
-            
-        visited.add(current)
+        closed.add(current)
         
-        for neighbor in maze.get_valid_moves(current):
-            if neighbor not in visited:
-                new_cost = cost + 1
-                heapq.heappush(heap, (new_cost, neighbor, path + [neighbor]))
+        if expanded is not None:
+            expanded.append(current)
+        new_cost = g + 1
+        for neighbor in indices[offsets[current]:offsets[current + 1]]:
+            if neighbor in closed:
+                continue
+            old_cost = cost.get(neighbor)
+            if old_cost is None or new_cost < old_cost:
+                if old_cost is not None:
+                    repushes += 1
+                cost[neighbor] = new_cost
+                heapq.heappush(heap, (new_cost + heuristic(neighbor), new_cost, neighbor))
+        if tracking and len(heap) > peak:
+            peak = len(heap)
+    
+    if tracking:
+        stats.record(maze, len(closed), len(cost) - 1 + repushes, repushes, peak, len(cost), expanded)
+    return _smallest_path(maze, cost, closed, start, goal) if found else None
+
+def bfs(maze, start, goal, stats=None):
+    return _search(maze, start, goal, 'fifo', stats=stats)
+
+def dfs(maze, start, goal, stats=None):
+    return _search(maze, start, goal, 'lifo', stats=stats)
+
+def ucs(maze, start, goal, stats=None):
+    return _search(maze, start, goal, 'best', stats=stats)
+
+def a_star(maze, start, goal, stats=None):
+    height = maze.height
+    goal_x, goal_y = goal
+    def heuristic(cell):
+        x, y = divmod(cell, height)
+        return abs(x - goal_x) + abs(y - goal_y)
+    
+    return _search(maze, start, goal, 'best', heuristic, stats)
+
+def a_star_alt(maze, start, goal, stats=None):
+    """A* with the ALT (A*, Landmarks, Triangle inequality) heuristic.
+
+    For every landmark L, |d(L, goal) - d(L, cell)| is a lower bound on the
+    distance from cell to goal; the largest of those bounds and the Manhattan
+    distance is still consistent, so paths are as short as a_star's while far
+    fewer cells are expanded around walls. The landmark tables are built once
+    per maze (Maze.landmark_tables) and reused by every search.
+    """
+    height = maze.height
+    goal_x, goal_y = goal
+    _, tables = maze.landmark_tables()
+    goal_cell = maze.cell_id(goal)
+    # Landmarks that cannot reach the goal give no bound. Cells they cannot
+    # reach either are not in the goal's component, so never on a path.
+    bounds = [(table, table[goal_cell]) for table in tables if table[goal_cell] >= 0]
+    def heuristic(cell):
+        x, y = divmod(cell, height)
+        h = abs(x - goal_x) + abs(y - goal_y)
+        for table, to_goal in bounds:
+            d = table[cell] - to_goal
+            if d < 0:
+                d = -d
+            if d > h:
+                h = d
+        return h
+
+    return _search(maze, start, goal, 'best', heuristic, stats)
+
+def bidirectional_bfs(maze, start, goal, stats=None):
+    """BFS from start and from goal at once, always growing the smaller frontier by one layer.
+
+    When a layer reaches cells the other side has already seen, the shortest
+    of those meetings joins the two parent chains, so the path is as short as
+    plain BFS's while only about two balls of half the radius are explored.
+    """
+    offsets, indices = maze.adjacency()
+    start, goal = maze.cell_id(start), maze.cell_id(goal)
+    parents = [{start: None}, {goal: None}]
+    depths = [{start: 0}, {goal: 0}]
+    frontiers = [[start], [goal]]
+    tracking = stats is not None
+    expanded = [] if tracking and stats.expanded is not None else None
+    expansions = 0
+    peak = 2
+    best = None if start != goal else (0, start, goal)  # (length, forward cell, backward cell)
     
-    return None
+    while best is None and frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        parent, depth, other = parents[side], depths[side], depths[1 - side]
+        next_layer = []
+        for current in frontiers[side]:
+            expansions += 1
+            if expanded is not None:
+                expanded.append(current)
+            new_depth = depth[current] + 1
+            for neighbor in indices[offsets[current]:offsets[current + 1]]:
+                if neighbor in other:
+                    length = new_depth + other[neighbor]
+                    if best is None or length < best[0]:
+                        best = (length, current, neighbor) if side == 0 else (length, neighbor, current)
+                if neighbor not in parent:
+                    parent[neighbor] = current
+                    depth[neighbor] = new_depth
+                    next_layer.append(neighbor)
+        frontiers[side] = next_layer
+        if tracking and len(frontiers[0]) + len(frontiers[1]) > peak:
+            peak = len(frontiers[0]) + len(frontiers[1])
+    
+    if tracking:
+        visited = len(parents[0]) + len(parents[1])
+        stats.record(maze, expansions, visited - 2, 0, peak, visited, expanded)
+    if best is None:
+        return None
+    _, forward, backward = best
+    path = _build_path(maze, parents[0], forward)
+    if backward != forward:
+        path.extend(_build_path(maze, parents[1], backward)[::-1])
+    return path
+
+def jps(maze, start, goal, stats=None):
+    """Jump Point Search for 4-connected grids (no diagonal moves).
 
-def a_star(maze, start, goal):
-    def heuristic(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+    A* over jump points only: from each point the search scans straight lines
+    and stops at the goal, at cells with a forced neighbor, or, when scanning
+    vertically, at cells from which a horizontal scan finds a jump point
+    (the pruning rules of PathFinding.js's never-move-diagonally finder). The
+    straight segments between jump points are filled in on the returned path,
+    which is as short as A*'s.
+    """
+    width, height = maze.width, maze.height
+    walkable = maze.open_cells()
+    goal_x, goal_y = goal
+    
+    def is_open(x, y):
+        return 0 <= x < width and 0 <= y < height and walkable[x * height + y]
     
-    heap = []
-    heapq.heappush(heap, (0 + heuristic(start, goal), 0, start, [start]))
-    visited = set()
+    def jump_horizontal(x, y, dx):
+        while is_open(x, y):
+            if (x == goal_x and y == goal_y
+                    or is_open(x, y - 1) and not is_open(x - dx, y - 1)
+                    or is_open(x, y + 1) and not is_open(x - dx, y + 1)):
+                return x, y
+            x += dx
+        return None
+    
+    def jump_vertical(x, y, dy):
+        while is_open(x, y):
+            if (x == goal_x and y == goal_y
+                    or is_open(x - 1, y) and not is_open(x - 1, y - dy)
+                    or is_open(x + 1, y) and not is_open(x + 1, y - dy)
+                    or jump_horizontal(x + 1, y, 1) or jump_horizontal(x - 1, y, -1)):
+                return x, y
+            y += dy
+        return None
+    
+    def jump(x, y, dx, dy):
+        return jump_horizontal(x + dx, y, dx) if dx else jump_vertical(x, y + dy, dy)
+    
+    if not is_open(*start):
+        return None
+    start_cell = maze.cell_id(start)
+    parent = {start_cell: None}
+    cost = {start_cell: 0}
+    closed = set()
+    heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, start)]
+    tracking = stats is not None
+    expanded = [] if tracking and stats.expanded is not None else None
+    pushes = repushes = 0
+    peak = 1
+    found = False
     
     while heap:
-        _, cost, current, path = heapq.heappop(heap)
-        
+        _, g, current = heapq.heappop(heap)
         if current == goal:
-            return path
-            
-        if current in visited:
+            found = True
+            break
+        cell = maze.cell_id(current)
+        if cell in closed:
             continue
+        closed.add(cell)
+        if expanded is not None:
+            expanded.append(cell)
+        
+        # Pruned directions: straight on and both sides, or all four at the start
+        x, y = current
+        if parent[cell] is None:
+            directions = DIRECTIONS
+        else:
+            px, py = maze.cell_position(parent[cell])
+            dx, dy = (x > px) - (x < px), (y > py) - (y < py)
+            directions = [(dx, dy), (dy, dx), (-dy, -dx)]
+        for dx, dy in directions:
+            point = jump(x, y, dx, dy)
+            if point is None:
+                continue
+            point_cell = maze.cell_id(point)
+            if point_cell in closed:
+                continue
+            new_cost = g + abs(point[0] - x) + abs(point[1] - y)
+            old_cost = cost.get(point_cell)
+            if old_cost is None or new_cost < old_cost:
+                if old_cost is not None:
+                    repushes += 1
+                pushes += 1
+                cost[point_cell] = new_cost
+                parent[point_cell] = cell
+                h = abs(point[0] - goal_x) + abs(point[1] - goal_y)
+                heapq.heappush(heap, (new_cost + h, new_cost, point))
+        if tracking and len(heap) > peak:
+            peak = len(heap)
+    
+    if tracking:
+        stats.record(maze, len(closed), pushes, repushes, peak, len(cost), expanded)
+    if not found:
+        return None
+    
+    # Fill in the straight segments between consecutive jump points
+    points = _build_path(maze, parent, maze.cell_id(goal))
+    path = [points[0]]
+    for x, y in points[1:]:
+        px, py = path[-1]
+        dx, dy = (x > px) - (x < px), (y > py) - (y < py)
+        while (px, py) != (x, y):
+            px, py = px + dx, py + dy
+            path.append((px, py))
+    return path
+
+class IncrementalAStar:
+    """A* that keeps its search tree between calls, for ghosts chasing a moving Pac-Man.
+
+    The tree is rooted at the ghost. Closed cells carry exact distances from the
+    root, which do not depend on the goal, so when only the goal moves the open
+    list is re-keyed with the new heuristic and the search simply continues.
+    When the ghost itself moves onto a closed cell, the subtree under that cell
+    keeps exact distances (shifted by the new root's cost) and becomes the new
+    tree; only the rest is searched again. Paths are the ones a fresh a_star
+    call returns. The tree is dropped when the maze or its grid changes.
+    """
+    def __init__(self):
+        self.maze = None
+        self.version = None
+        self.root = None
+        self.parent = {}
+        self.cost = {}
+        self.closed = set()
+        self.open = set()
+        self.last_expanded = 0
+
+    def reset(self, maze, start):
+        """Start a new tree containing only start."""
+        self.maze = maze
+        self.version = maze.version
+        self.root = start
+        self.parent = {start: None}
+        self.cost = {start: 0}
+        self.closed = set()
+        self.open = {start}
+
+    def reroot(self, start):
+        """Keep only the subtree under start and rebuild the open list around it."""
+        offsets, indices = self.maze.adjacency()
+        children = {}
+        for cell in self.closed:
+            parent = self.parent[cell]
+            if parent is not None:
+                children.setdefault(parent, []).append(cell)
+        
+        base = self.cost[start]
+        parent = {start: None}
+        cost = {start: 0}
+        stack = [start]
+        while stack:
+            cell = stack.pop()
+            for child in children.get(cell, ()):
+                parent[child] = cell
+                cost[child] = self.cost[child] - base
+                stack.append(child)
+        closed = set(cost)
+        
+        # Every open neighbor of the kept subtree goes back on the frontier
+        open_cells = set()
+        for cell in closed:
+            new_cost = cost[cell] + 1
+            for neighbor in indices[offsets[cell]:offsets[cell + 1]]:
+                if neighbor in closed:
+                    continue
+                if neighbor not in open_cells or new_cost < cost[neighbor]:
+                    cost[neighbor] = new_cost
+                    parent[neighbor] = cell
+                    open_cells.add(neighbor)
+        
+        self.root = start
+        self.parent, self.cost, self.closed, self.open = parent, cost, closed, open_cells
+
+    def __call__(self, maze, start, goal, stats=None):
+        start, goal_cell = maze.cell_id(start), maze.cell_id(goal)
+        stale = maze is not self.maze or maze.version != self.version
+        if stale or (start != self.root and start not in self.closed):
+            self.reset(maze, start)
+        elif start != self.root:
+            self.reroot(start)
+        
+        height = maze.height
+        goal_x, goal_y = goal
+        def heuristic(cell):
+            x, y = divmod(cell, height)
+            return abs(x - goal_x) + abs(y - goal_y)
+        
+        offsets, indices = maze.adjacency()
+        parent, cost, closed, open_cells = self.parent, self.cost, self.closed, self.open
+        heap = [(cost[cell] + heuristic(cell), cost[cell], cell) for cell in open_cells]
+        heapq.heapify(heap)
+        tracking = stats is not None
+        expanded_cells = [] if tracking and stats.expanded is not None else None
+        peak = len(heap)
+        expanded = pushes = repushes = 0
+        found = goal_cell in closed
+        # A goal closed by an earlier call has its exact cost, but a fresh a_star
+        # would also have closed every cell it pops before the goal's (f, g),
+        # which _smallest_path needs; those still open are popped first
+        bound = (cost[goal_cell], cost[goal_cell]) if found else None
+        
+        while heap and (bound is None or heap[0][:2] < bound):
+            _, g, current = heapq.heappop(heap)
+            if current in closed or g != cost[current]:
+                continue
+            if current == goal_cell:
+                found = True
+                break
+            closed.add(current)
+            open_cells.discard(current)
+            expanded += 1
             
-        visited.add(current)
+            if expanded_cells is not None:
+                expanded_cells.append(current)
+            new_cost = g + 1
+            for neighbor in indices[offsets[current]:offsets[current + 1]]:
+                if neighbor in closed:
+                    continue
+                if neighbor not in open_cells or new_cost < cost[neighbor]:
+                    if neighbor in open_cells:
+                        repushes += 1
+                    pushes += 1
+                    cost[neighbor] = new_cost
+                    parent[neighbor] = current
+                    open_cells.add(neighbor)
+                    heapq.heappush(heap, (new_cost + heuristic(neighbor), new_cost, neighbor))
+            if tracking and len(heap) > peak:
+                peak = len(heap)
         
-        for neighbor in maze.get_valid_moves(current):
-            if neighbor not in visited:
-                new_cost = cost + 1
-                heapq.heappush(
-                    heap, 
-                    (new_cost + heuristic(neighbor, goal), 
-                    new_cost, 
-                    neighbor, 
-                    path + [neighbor])
-                )
+        self.last_expanded = expanded
+        if tracking:
+            stats.record(maze, expanded, pushes, repushes, peak, len(cost), expanded_cells)
+        return _smallest_path(maze, cost, closed, start, goal_cell) if found else None
+
+def follow_field(maze, start, goal, stats=None):
+    """Walk down the maze's shared distance field from start to goal.
+
+    Not a search of its own: the distance map to goal is computed once per
+    goal and shared by every ghost, so each step is an O(1) lookup and stats
+    has nothing to count.
+    """
+    dist = maze.distance_field(goal)
+    offsets, indices = maze.adjacency()
+    cell = maze.cell_id(start)
+    if dist[cell] < 0:
+        return None
     
-    return None
\ No newline at end of file
+    path = [start]
+    while dist[cell] > 0:
+        for neighbor in indices[offsets[cell]:offsets[cell + 1]]:
+            if dist[neighbor] == dist[cell] - 1:
+                cell = neighbor
+                break
+        path.append(maze.cell_position(cell))
+    return path
+
+class PathCache:
+    """Bounded LRU cache in front of the search functions.
+
+    Entries are keyed by (maze version, algorithm, start, goal). Every grid
+    change gives the maze a new version, so stale entries are never hit and
+    simply age out. On a miss, a cached path to the same goal that already
+    passes through start is reused from that point on: for the optimal
+    algorithms (everything but dfs) a suffix of a shortest path is itself a
+    shortest path, although not always the one a fresh search would pick.
+    """
+    # How many recent paths per (version, algorithm, goal) are scanned for a suffix
+    SUFFIX_CANDIDATES = 8
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.by_goal = {}  # (version, algorithm, goal) -> keys of cached paths to that goal
+        self.hits = 0
+        self.suffix_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()  # Ghost threads share one cache
+
+    def search(self, algorithm, maze, start, goal, stats=None, reuse_suffix=True):
+        """Return algorithm(maze, start, goal), from the cache when possible."""
+        name = getattr(algorithm, '__name__', type(algorithm).__name__)
+        key = (maze.version, name, start, goal)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                path = self.entries[key]
+                return list(path) if path is not None else None
+            
+            if reuse_suffix:
+                for other in self.by_goal.get(key[:2] + (goal,), ())[-self.SUFFIX_CANDIDATES:]:
+                    path = self.entries[other]
+                    if path is not None and start in path:
+                        self.hits += 1
+                        self.suffix_hits += 1
+                        return path[path.index(start):]
+            self.misses += 1
+        
+        path = algorithm(maze, start, goal, stats=stats)
+        with self.lock:
+            self.store(key, path)
+        return list(path) if path is not None else None
+
+    def store(self, key, path):
+        """Insert an entry and evict the least recently used ones beyond maxsize."""
+        if key not in self.entries:
+            self.by_goal.setdefault(key[:2] + key[3:], []).append(key)
+        self.entries[key] = path
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            old_key, _ = self.entries.popitem(last=False)
+            goal_key = old_key[:2] + old_key[3:]
+            self.by_goal[goal_key].remove(old_key)
+            if not self.by_goal[goal_key]:
+                del self.by_goal[goal_key]
+
+    def wrap(self, algorithm, reuse_suffix=True):
+        """Cached version of algorithm with the usual (maze, start, goal, stats=None) signature."""
+        def cached(maze, start, goal, stats=None):
+            return self.search(algorithm, maze, start, goal, stats, reuse_suffix)
+        cached.__name__ = getattr(algorithm, '__name__', type(algorithm).__name__)
+        return cached
+
+    def info(self):
+        """Hit/miss counters, in the spirit of functools.lru_cache's cache_info()."""
+        with self.lock:
+            return {'hits': self.hits, 'suffix_hits': self.suffix_hits, 'misses': self.misses,
+                    'size': len(self.entries), 'maxsize': self.maxsize}
@@ -0,0 +1,324 @@
+"""Hierarchical path-finding (HPA*) for large mazes.
+
+The maze is cut into square clusters. Along the border of two neighboring
+clusters, every run of open cell pairs is an entrance: one transition in its
+middle, or one at each end of a long run. The transition cells are the nodes
+of an abstract graph, linked across the border with cost 1 and, inside a
+cluster, by their exact BFS distance within that cluster. A search inserts
+start and goal into their clusters, runs A* on the abstract graph and turns
+the abstract hops back into cells.
+
+Entrances are found for the whole maze when a planner first sees it;
+distances inside a cluster are computed the first time a search enters it.
+After Maze.grid_changed(cells), only the clusters around those cells are
+scanned again.
+
+    planner = HierarchicalPlanner()
+    path = planner(maze, start, goal)
+"""
+import heapq
+import threading
+import numpy as np
+from collections import deque
+from ghosts import a_star
+
+CLUSTER_SIZE = 16
+# Runs of at least this many open pairs get a transition at each end
+LONG_ENTRANCE = 6
+
+class HierarchicalPlanner:
+    """HPA* search with the same call signature as the searches in ghosts.py.
+
+    Returns the whole path by default. With first_segment, only the abstract
+    hops up to the first cell outside the start's cluster are refined into
+    cells, which is all a ghost needs before it plans again. When start and
+    goal are in the same or neighboring clusters, the detours through
+    transition cells would matter most, so plain a_star answers instead and
+    those paths are the shortest. Farther apart, paths are not always the
+    shortest: on 70x55 to 150x150 mazes they average 1-2% longer, about one
+    in ten is more than 5% longer and the worst are about 25% longer.
+    """
+    def __init__(self, cluster_size=CLUSTER_SIZE, first_segment=False):
+        self.cluster_size = cluster_size
+        self.first_segment = first_segment
+        self.maze = None
+        self.version = None
+        self.borders = {}    # (cluster, right or lower neighbor) -> [(cell, cell across)]
+        self.links = {}      # transition cell -> transition cells across a border
+        self.entrances = {}  # cluster -> its transition cells
+        self.distances = {}  # cluster -> {cell: {cell: distance inside the cluster}}, built lazily
+        self.visited = 0     # Cells reached by the cluster BFSs of the current search
+        self.lock = threading.Lock()
+
+    def __call__(self, maze, start, goal, stats=None):
+        with self.lock:
+            self.sync(maze)
+            return self.search(start, goal, stats)
+
+    def sync(self, maze):
+        """Bring the abstraction up to date: local updates after cell edits, otherwise a rebuild."""
+        if maze is self.maze:
+            cells = maze.changes_since(self.version)
+            if cells is not None:
+                if cells:
+                    self.update(cells)
+                self.version = maze.version
+                return
+        self.build(maze)
+
+    def build(self, maze):
+        """Find the entrances of every cluster border of maze."""
+        self.maze = maze
+        self.version = maze.version
+        self.borders, self.links, self.distances = {}, {}, {}
+        size = self.cluster_size
+        columns, rows = -(-maze.width // size), -(-maze.height // size)
+        self.entrances = {(cx, cy): set() for cx in range(columns) for cy in range(rows)}
+        for cx, cy in self.entrances:
+            if cx + 1 < columns:
+                self.scan_border((cx, cy), (cx + 1, cy))
+            if cy + 1 < rows:
+                self.scan_border((cx, cy), (cx, cy + 1))
+
+    def update(self, positions):
+        """Scan the borders of the clusters holding positions again and drop their distances."""
+        size = self.cluster_size
+        for x, y in positions:
+            cx, cy = x // size, y // size
+            for border in (((cx - 1, cy), (cx, cy)), ((cx, cy - 1), (cx, cy)),
+                           ((cx, cy), (cx + 1, cy)), ((cx, cy), (cx, cy + 1))):
+                if border in self.borders:
+                    self.scan_border(*border)
+            # Neighbors may have gained or lost transitions on the shared borders
+            for cluster in ((cx, cy), (cx - 1, cy), (cx + 1, cy), (cx, cy - 1), (cx, cy + 1)):
+                self.distances.pop(cluster, None)
+
+    def scan_border(self, cluster, neighbor):
+        """Replace the transitions between cluster and its right or lower neighbor."""
+        maze, size = self.maze, self.cluster_size
+        height = maze.height
+        for a, b in self.borders.pop((cluster, neighbor), ()):
+            self.unlink(a, b)
+        grid = maze.grid
+        if neighbor[0] > cluster[0]:
+            # Vertical border between columns x and x + 1
+            x = neighbor[0] * size - 1
+            low, high = cluster[1] * size, min((cluster[1] + 1) * size, maze.height)
+            passable = (grid[low:high, x] == 0) & (grid[low:high, x + 1] == 0)
+            pair = lambda i: (x * height + low + i, (x + 1) * height + low + i)
+        else:
+            # Horizontal border between rows y and y + 1
+            y = neighbor[1] * size - 1
+            low, high = cluster[0] * size, min((cluster[0] + 1) * size, maze.width)
+            passable = (grid[y, low:high] == 0) & (grid[y + 1, low:high] == 0)
+            pair = lambda i: ((low + i) * height + y, (low + i) * height + y + 1)
+
+        transitions = []
+        run = 0
+        for i, is_open in enumerate(passable.tolist() + [False]):
+            if is_open:
+                run += 1
+                continue
+            if run >= LONG_ENTRANCE:
+                transitions.extend((pair(i - run), pair(i - 1)))
+            elif run:
+                transitions.append(pair(i - (run + 1) // 2))
+            run = 0
+        self.borders[(cluster, neighbor)] = transitions
+        for a, b in transitions:
+            self.links.setdefault(a, set()).add(b)
+            self.links.setdefault(b, set()).add(a)
+            self.entrances[cluster].add(a)
+            self.entrances[neighbor].add(b)
+
+    def unlink(self, a, b):
+        """Remove the transition a <-> b, and its cells from the entrances once they have no links."""
+        for cell, other in ((a, b), (b, a)):
+            links = self.links.get(cell)
+            if links is None:
+                continue
+            links.discard(other)
+            if not links:
+                del self.links[cell]
+                self.entrances[self.cluster_of(cell)].discard(cell)
+
+    def cluster_of(self, cell):
+        """(column, row) of the cluster holding a cell id"""
+        x, y = divmod(cell, self.maze.height)
+        return x // self.cluster_size, y // self.cluster_size
+
+    def cluster_graph(self, cluster):
+        """Open cells of a cluster and their neighbor lists, by index inside the cluster.
+
+        Returns (cells, neighbors, index): cell ids, neighbor indices per cell
+        and cell id -> index. Searches inside a cluster use this small graph
+        instead of bounds-checking every neighbor in the maze's index.
+        """
+        size, height = self.cluster_size, self.maze.height
+        x0, y0 = cluster[0] * size, cluster[1] * size
+        x1, y1 = min(x0 + size, self.maze.width), min(y0 + size, height)
+        # Flat indices of the open cells, column by column like cell ids
+        rows = y1 - y0
+        open_cells = np.flatnonzero(self.maze.grid[y0:y1, x0:x1].T == 0).tolist()
+        cells = [(x0 + i // rows) * height + y0 + i % rows for i in open_cells]
+        index = {cell: i for i, cell in enumerate(cells)}
+        offsets, indices = self.maze.adjacency()
+        neighbors = [[index[n] for n in indices[offsets[cell]:offsets[cell + 1]] if n in index]
+                     for cell in cells]
+        return cells, neighbors, index
+
+    def local_search(self, source, graph):
+        """BFS from source inside one cluster's graph; returns (distance, parent) lists by index."""
+        cells, neighbors, index = graph
+        distance = [-1] * len(cells)
+        parent = [-1] * len(cells)
+        root = index[source]
+        distance[root] = 0
+        queue = deque([root])
+        reached = 1
+        while queue:
+            i = queue.popleft()
+            d = distance[i] + 1
+            for j in neighbors[i]:
+                if distance[j] < 0:
+                    distance[j] = d
+                    parent[j] = i
+                    queue.append(j)
+                    reached += 1
+        self.visited += reached
+        return distance, parent
+
+    def cluster_distances(self, cluster):
+        """Distances between the transitions of a cluster, computed on first use."""
+        table = self.distances.get(cluster)
+        if table is None:
+            graph = self.cluster_graph(cluster)
+            index = graph[2]
+            entrances = self.entrances[cluster]
+            table = {}
+            for entrance in entrances:
+                distance, _ = self.local_search(entrance, graph)
+                table[entrance] = {other: distance[index[other]] for other in entrances
+                                   if other != entrance and distance[index[other]] >= 0}
+            self.distances[cluster] = table
+        return table
+
+    def search(self, start, goal, stats=None):
+        """A* on the abstract graph with start and goal inserted, then refinement into cells."""
+        maze = self.maze
+        height = maze.height
+        start, goal = maze.cell_id(start), maze.cell_id(goal)
+        self.visited = 0
+        start_cluster, goal_cluster = self.cluster_of(start), self.cluster_of(goal)
+        if abs(start_cluster[0] - goal_cluster[0]) <= 1 and abs(start_cluster[1] - goal_cluster[1]) <= 1:
+            return a_star(maze, maze.cell_position(start), maze.cell_position(goal), stats)
+        start_graph = self.cluster_graph(start_cluster)
+        goal_graph = start_graph if goal_cluster == start_cluster else self.cluster_graph(goal_cluster)
+        if start not in start_graph[2] or goal not in goal_graph[2]:
+            return None  # On a wall
+        start_tree = (start_graph, *self.local_search(start, start_graph))
+        goal_tree = (goal_graph, *self.local_search(goal, goal_graph))
+        # Edges of the two inserted nodes; the goal may be reached without leaving the cluster
+        from_start = self.tree_distances(start_tree, self.entrances[start_cluster] | {goal})
+        from_start.pop(start, None)
+        to_goal = self.tree_distances(goal_tree, self.entrances[goal_cluster])
+        to_goal.pop(goal, None)
+
+        goal_x, goal_y = divmod(goal, height)
+        def heuristic(cell):
+            x, y = divmod(cell, height)
+            return abs(x - goal_x) + abs(y - goal_y)
+
+        cost = {start: 0}
+        parent = {start: None}
+        heap = [(heuristic(start), start)]
+        closed = set()
+        tracking = stats is not None
+        expanded = [] if tracking and stats.expanded is not None else None
+        pushes = 1
+        repushes = 0
+        peak = 1
+        found = start == goal
+        while heap and not found:
+            _, node = heapq.heappop(heap)
+            if node in closed:
+                continue
+            if node == goal:
+                found = True
+                break
+            closed.add(node)
+            if expanded is not None:
+                expanded.append(node)
+            if node == start:
+                edges = list(from_start.items())
+            else:
+                edges = list(self.cluster_distances(self.cluster_of(node))[node].items())
+                if node in to_goal:
+                    edges.append((goal, to_goal[node]))
+            edges.extend((other, 1) for other in self.links.get(node, ()))
+            for neighbor, d in edges:
+                new_cost = cost[node] + d
+                if neighbor not in cost or new_cost < cost[neighbor]:
+                    if neighbor in cost:
+                        repushes += 1
+                    cost[neighbor] = new_cost
+                    parent[neighbor] = node
+                    heapq.heappush(heap, (new_cost + heuristic(neighbor), neighbor))
+                    pushes += 1
+            if tracking and len(heap) > peak:
+                peak = len(heap)
+
+        path = None
+        if found:
+            nodes = []
+            node = goal
+            while node is not None:
+                nodes.append(node)
+                node = parent[node]
+            nodes.reverse()
+            cells = [start]
+            for u, v in zip(nodes, nodes[1:]):
+                cells.extend(self.refine(u, v, start, start_tree, goal, goal_tree)[1:])
+                if self.first_segment and self.cluster_of(v) != start_cluster:
+                    break
+            path = [maze.cell_position(cell) for cell in cells]
+        if tracking:
+            # Expansions are abstract nodes, comparable to the other searches' cells
+            stats.record(maze, len(closed), pushes, repushes, peak, len(cost) + self.visited, expanded)
+            stats.cluster_cells += self.visited
+        return path
+
+    def tree_distances(self, tree, targets):
+        """{cell: distance} of the targets a local_search tree reached"""
+        (_, _, index), distance, _ = tree
+        reached = {}
+        for cell in targets:
+            i = index.get(cell)
+            if i is not None and distance[i] >= 0:
+                reached[cell] = distance[i]
+        return reached
+
+    def chain(self, tree, cell):
+        """Cell ids from cell back to the root of a local_search tree"""
+        (cells, _, index), _, parent = tree
+        i = index[cell]
+        path = []
+        while i >= 0:
+            path.append(cells[i])
+            i = parent[i]
+        return path
+
+    def refine(self, u, v, start, start_tree, goal, goal_tree):
+        """Cells of one abstract hop from u to v, both included."""
+        cluster = self.cluster_of(u)
+        if cluster != self.cluster_of(v):
+            return [u, v]  # Across a border
+        if v == goal:
+            # The goal's BFS tree already leads from u to the goal
+            return self.chain(goal_tree, u)
+        if u == start:
+            tree = start_tree
+        else:
+            graph = self.cluster_graph(cluster)
+            tree = (graph, *self.local_search(u, graph))
+        return self.chain(tree, v)[::-1]
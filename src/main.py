@@ -1,41 +1,40 @@
 import pygame
+import random
 import sys
+import numpy as np
+from collections import deque
+import bench
+from events import EventLog, DEBUG, INFO
 from maze import Maze
-from pacman import PacMan
-from ghosts import Ghost, bfs, dfs, ucs, a_star
+from profiler import Profiler
+from replay import ReplayRecorder
+from simulator import Simulator, NO_SPAN, BLUE, PINK, ORANGE, RED, UP, DOWN, LEFT, RIGHT
 from utils import run_tests, print_results
 
-# Initialize pygame
-pygame.init()
 WIDTH, HEIGHT = 800, 600
 CELL_SIZE = 30
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Pac-Man Search Algorithms")
-clock = pygame.time.Clock()
+# The game is simulated in fixed steps of SIM_STEP seconds, independent of the frame rate
+SIM_STEP = 1 / 60
+MAX_FRAME_TIME = 0.25
 
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 YELLOW = (255, 255, 0)
-BLUE = (0, 0, 255)
-PINK = (255, 182, 193)
-ORANGE = (255, 165, 0)
-RED = (255, 0, 0)
 WALL_COLOR = (0, 0, 128)
 GREEN = (0, 255, 0)
 
-# Font
-font = pygame.font.SysFont("arial", 24)
-title_font = pygame.font.SysFont("arial", 36)
-
-# Load and scale Pac-Man image
-try:
-    pacman_image = pygame.image.load("images/pacman.png").convert_alpha()
-    # Scale image to match the size of the original Pac-Man (CELL_SIZE - 4 to match the circle size)
-    pacman_image = pygame.transform.scale(pacman_image, (CELL_SIZE - 4, CELL_SIZE - 4))
-except FileNotFoundError:
-    pacman_image = None
-    print("Pac-Man image not found, falling back to default circle.")
+# Pygame objects, created by init_display() so that importing this module
+# does not open a window
+screen = None
+clock = None
+font = None
+title_font = None
+small_font = None
+pacman_image = None
+ghost_images = {}
+eat_dot_sound = None
+game_over_sound = None
 
 # Load ghost images (scaled to fit CELL_SIZE - 4)
 def load_ghost_image(filename):
@@ -46,78 +45,214 @@ def load_ghost_image(filename):
         print(f"{filename} not found, using colored circle fallback.")
         return None
 
-ghost_images = {
-    BLUE: load_ghost_image("blue_ghost.png"),
-    PINK: load_ghost_image("pink_ghost.png"),
-    ORANGE: load_ghost_image("orange_ghost.png"),
-    RED: load_ghost_image("red_ghost.png"),
-}
+def init_display():
+    """Initialize pygame and load the window, fonts, images and sounds."""
+    global screen, clock, font, title_font, small_font, pacman_image, ghost_images, eat_dot_sound, game_over_sound
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Pac-Man Search Algorithms")
+    clock = pygame.time.Clock()
+
+    # Font
+    font = pygame.font.SysFont("arial", 24)
+    title_font = pygame.font.SysFont("arial", 36)
+    small_font = pygame.font.SysFont("arial", 16)
 
+    # Load and scale Pac-Man image
+    try:
+        pacman_image = pygame.image.load("images/pacman.png").convert_alpha()
+        # Scale image to match the size of the original Pac-Man (CELL_SIZE - 4 to match the circle size)
+        pacman_image = pygame.transform.scale(pacman_image, (CELL_SIZE - 4, CELL_SIZE - 4))
+    except FileNotFoundError:
+        pacman_image = None
+        print("Pac-Man image not found, falling back to default circle.")
 
-# Sounds
-try:
-    eat_dot_sound = pygame.mixer.Sound("sounds/eat_dot.wav")
-    game_over_sound = pygame.mixer.Sound("sounds/game_over.wav")
-except FileNotFoundError:
-    eat_dot_sound = None
-    game_over_sound = None
+    ghost_images = {
+        BLUE: load_ghost_image("blue_ghost.png"),
+        PINK: load_ghost_image("pink_ghost.png"),
+        ORANGE: load_ghost_image("orange_ghost.png"),
+        RED: load_ghost_image("red_ghost.png"),
+    }
 
-def draw_maze(maze, pacman, ghosts, score, level):
-    """Draw the maze, Pac-Man, ghosts, dots, walls, score, level, and quit instruction."""
-    screen.fill(BLACK)
-    # Draw dots
-    for dot in maze.dots:
-        pygame.draw.circle(screen, WHITE, 
-                          (dot[0] * CELL_SIZE + CELL_SIZE//2, 
-                           dot[1] * CELL_SIZE + CELL_SIZE//2), 
-                          CELL_SIZE//8)
-    # Draw walls
-    for y in range(maze.height):
-        for x in range(maze.width):
-            if maze.is_wall((x, y)):
-                pygame.draw.rect(screen, WALL_COLOR, 
-                                (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-    # Draw Pac-Man
-    if pacman_image:
-        # Calculate position to center the image
-        pacman_rect = pacman_image.get_rect(center=(
-            pacman.position[0] * CELL_SIZE + CELL_SIZE//2,
-            pacman.position[1] * CELL_SIZE + CELL_SIZE//2
-        ))
-        screen.blit(pacman_image, pacman_rect)
-    else:
-        # Fallback to default circle if image is not available
-        pygame.draw.circle(screen, YELLOW, 
-                          (pacman.position[0] * CELL_SIZE + CELL_SIZE//2, 
-                           pacman.position[1] * CELL_SIZE + CELL_SIZE//2), 
-                          CELL_SIZE//2 - 2)
-    # Draw ghosts
-    for ghost in ghosts:
-        ghost_img = ghost_images.get(ghost.color)
-        if ghost_img:
-            ghost_rect = ghost_img.get_rect(center=(
-                ghost.position[0] * CELL_SIZE + CELL_SIZE // 2,
-                ghost.position[1] * CELL_SIZE + CELL_SIZE // 2
-            ))
-            screen.blit(ghost_img, ghost_rect)
+    # Sounds
+    try:
+        eat_dot_sound = pygame.mixer.Sound("sounds/eat_dot.wav")
+        game_over_sound = pygame.mixer.Sound("sounds/game_over.wav")
+    except FileNotFoundError:
+        eat_dot_sound = None
+        game_over_sound = None
+
+def cell_rect(position):
+    """Screen rectangle of a maze cell."""
+    return pygame.Rect(position[0] * CELL_SIZE, position[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+class MazeRenderer:
+    """Draws the game screen, redrawing only what changed since the last frame.
+
+    Walls are pre-rendered once per level into a cached Surface and text is
+    rendered once per distinct string. After the first full frame, only the
+    cells Pac-Man and the ghosts left or entered (which includes any dot just
+    eaten) and the score/level text when it changes are redrawn, and only
+    those rectangles are pushed with pygame.display.update(rects).
+    """
+    def __init__(self):
+        self.maze = None
+        self.static = None
+        self.text_cache = {}
+        self.sprite_cells = set()
+        self.hud = None
+        self.hud_rects = []
+        self.overlay = None
+        self.overlay_rects = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Force a full redraw on the next frame (after another screen was shown)."""
+        self.full_redraw = True
+
+    def start_level(self, maze):
+        """Pre-render the walls of a new maze."""
+        self.maze = maze
+        self.static = pygame.Surface((maze.width * CELL_SIZE, maze.height * CELL_SIZE))
+        self.static.fill(BLACK)
+        for y, x in np.argwhere(maze.grid == 1):
+            pygame.draw.rect(self.static, WALL_COLOR, cell_rect((x, y)))
+        self.sprite_cells = set()
+        self.full_redraw = True
+
+    def text(self, string):
+        """Rendered text Surface, cached per string."""
+        surface = self.text_cache.get(string)
+        if surface is None:
+            surface = self.text_cache[string] = font.render(string, True, WHITE)
+        return surface
+
+    def draw_cell(self, position):
+        """Restore one cell from the wall layer and draw its dot if it still has one."""
+        rect = cell_rect(position)
+        screen.blit(self.static, rect, rect)
+        if position in self.maze.dots:
+            pygame.draw.circle(screen, WHITE, rect.center, CELL_SIZE//8)
+        return rect
+
+    def ghost_centers(self, ghosts, ghost_from, alpha):
+        """Pixel center of every ghost, between its previous and current cell when interpolating."""
+        centers = []
+        for i, ghost in enumerate(ghosts):
+            to_x, to_y = cell_rect(ghost.position).center
+            if ghost_from is None:
+                centers.append((to_x, to_y))
+                continue
+            from_x, from_y = cell_rect(ghost_from[i]).center
+            centers.append((round(from_x + (to_x - from_x) * alpha), round(from_y + (to_y - from_y) * alpha)))
+        return centers
+
+    def draw_sprites(self, pacman, ghosts, centers):
+        # Draw Pac-Man
+        if pacman_image:
+            # Calculate position to center the image
+            screen.blit(pacman_image, pacman_image.get_rect(center=cell_rect(pacman.position).center))
         else:
-            pygame.draw.circle(screen, ghost.color,
-                            (ghost.position[0] * CELL_SIZE + CELL_SIZE // 2,
-                            ghost.position[1] * CELL_SIZE + CELL_SIZE // 2),
-                            CELL_SIZE // 2 - 2)
-
-    # Draw score and level
-    score_text = font.render(f"Score: {score}", True, WHITE)
-    level_text = font.render(f"Level: {level}", True, WHITE)
-    screen.blit(score_text, (655, 40))
-    screen.blit(level_text, (655, 70))
-    # Draw quit instruction
-    quit_text = font.render("Press Q to Quit", True, WHITE)
-    screen.blit(quit_text, (WIDTH - quit_text.get_width() - 10, 10))
-    pygame.display.flip()
+            # Fallback to default circle if image is not available
+            pygame.draw.circle(screen, YELLOW, cell_rect(pacman.position).center, CELL_SIZE//2 - 2)
+        # Draw ghosts
+        for ghost, center in zip(ghosts, centers):
+            ghost_img = ghost_images.get(ghost.color)
+            if ghost_img:
+                screen.blit(ghost_img, ghost_img.get_rect(center=center))
+            else:
+                pygame.draw.circle(screen, ghost.color, center, CELL_SIZE // 2 - 2)
+
+    def draw_hud(self, score, level):
+        """Draw score and level, clearing the previous text first; returns the touched rects."""
+        rects = []
+        for rect in self.hud_rects:
+            screen.fill(BLACK, rect)
+            rects.append(rect)
+        self.hud_rects = [
+            screen.blit(self.text(f"Score: {score}"), (655, 40)),
+            screen.blit(self.text(f"Level: {level}"), (655, 70)),
+        ]
+        self.hud = (score, level)
+        return rects + self.hud_rects
+
+    def draw_overlay(self, lines):
+        """Draw the profiler overlay (text, color) lines under the HUD, clearing the previous ones."""
+        rects = []
+        for rect in self.overlay_rects:
+            screen.fill(BLACK, rect)
+            rects.append(rect)
+        self.overlay_rects = [screen.blit(small_font.render(text, True, color), (615, 120 + 20 * i))
+                              for i, (text, color) in enumerate(lines)]
+        self.overlay = lines
+        return rects + self.overlay_rects
+
+    def draw(self, maze, pacman, ghosts, score, level, ghost_from=None, alpha=1.0, overlay=None):
+        if maze is not self.maze:
+            self.start_level(maze)
+        cells = {pacman.position} | {ghost.position for ghost in ghosts}
+        if ghost_from is not None:
+            # An interpolated ghost overlaps both the cell it left and the one it entered
+            cells.update(ghost_from)
+        centers = self.ghost_centers(ghosts, ghost_from, alpha)
+
+        if self.full_redraw:
+            screen.fill(BLACK)
+            screen.blit(self.static, (0, 0))
+            # Draw dots
+            for dot in maze.dots:
+                pygame.draw.circle(screen, WHITE, cell_rect(dot).center, CELL_SIZE//8)
+            self.draw_sprites(pacman, ghosts, centers)
+            self.hud_rects = []
+            self.draw_hud(score, level)
+            self.overlay_rects = []
+            self.draw_overlay(overlay or [])
+            # Draw quit instruction
+            quit_text = self.text("Press Q to Quit")
+            screen.blit(quit_text, (WIDTH - quit_text.get_width() - 10, 10))
+            pygame.display.flip()
+            maze.dots.take_dirty()
+            self.full_redraw = False
+            self.sprite_cells = cells
+            return
+
+        # Cells sprites left or entered and dots eaten since the last frame
+        changed = self.sprite_cells | cells | maze.dots.take_dirty()
+        dirty = [self.draw_cell(position) for position in changed]
+        self.draw_sprites(pacman, ghosts, centers)
+        if self.hud != (score, level) or any(rect.collidelist(self.hud_rects) >= 0 for rect in dirty):
+            dirty.extend(self.draw_hud(score, level))
+        if (overlay or []) != self.overlay:
+            dirty.extend(self.draw_overlay(overlay or []))
+        self.sprite_cells = cells
+        pygame.display.update(dirty)
+
+renderer = MazeRenderer()
+
+def draw_maze(maze, pacman, ghosts, score, level, ghost_from=None, alpha=1.0, overlay=None):
+    """Draw the maze, Pac-Man, ghosts, dots, walls, score, level, and quit instruction.
+
+    With ghost_from, each ghost is drawn alpha of the way from that position to its current one.
+    overlay is a list of (text, color) lines shown under the score (the profiler overlay).
+    """
+    renderer.draw(maze, pacman, ghosts, score, level, ghost_from, alpha, overlay)
+
+def profiler_overlay(profiler, ghosts):
+    """Overlay lines with the profiler's rolling counters: frame times, replans, searches per ghost."""
+    counters = profiler.counters()
+    frame = counters['frame_ms']
+    lines = [("Frame ms p50/p95/p99", WHITE),
+             (f"{frame[50]:.1f} / {frame[95]:.1f} / {frame[99]:.1f}", WHITE),
+             (f"Replans/s: {counters['replans_per_s']}", WHITE)]
+    for ghost in ghosts:
+        search = counters['ghosts'].get(ghost.color)
+        if search:
+            lines.append((f"{search['avg_ms']:.2f} ms, {search['avg_expanded']:.0f} exp", ghost.color))
+    return lines
 
 def draw_game_over(score, level):
     """Display game over screen with final score and level."""
+    renderer.invalidate()
     screen.fill(BLACK)
     game_over_text = title_font.render("Game Over!", True, RED)
     score_text = font.render(f"Final Score: {score}", True, WHITE)
@@ -131,6 +266,7 @@ def draw_game_over(score, level):
 
 def draw_level_selection():
     """Display level selection screen."""
+    renderer.invalidate()
     screen.fill(BLACK)
     title = title_font.render("PAC-MAN SEARCH ALGORITHMS", True, YELLOW)
     subtitle = font.render("Select a level to start:", True, WHITE)
@@ -140,6 +276,9 @@ def draw_level_selection():
     level4 = font.render("4. Red Ghost (A*) - Pac-Man stationary", True, RED)
     level5 = font.render("5. All Ghosts - Pac-Man stationary", True, WHITE)
     level6 = font.render("6. All Ghosts - Player controls Pac-Man", True, GREEN)
+    level7 = font.render("7. Blue Ghost (Bidirectional BFS) - Pac-Man stationary", True, BLUE)
+    level8 = font.render("8. Red Ghost (Jump Point Search) - Pac-Man stationary", True, RED)
+    level9 = font.render("9. Orange Ghost (Hierarchical A*) - Pac-Man stationary", True, ORANGE)
     screen.blit(title, (WIDTH//2 - title.get_width()//2, 50))
     screen.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, 120))
     screen.blit(level1, (WIDTH//2 - level1.get_width()//2, 180))
@@ -148,174 +287,179 @@ def draw_level_selection():
     screen.blit(level4, (WIDTH//2 - level4.get_width()//2, 300))
     screen.blit(level5, (WIDTH//2 - level5.get_width()//2, 340))
     screen.blit(level6, (WIDTH//2 - level6.get_width()//2, 380))
+    screen.blit(level7, (WIDTH//2 - level7.get_width()//2, 420))
+    screen.blit(level8, (WIDTH//2 - level8.get_width()//2, 460))
+    screen.blit(level9, (WIDTH//2 - level9.get_width()//2, 500))
     pygame.display.flip()
 
-def initialize_game(level):
-    """Initialize game state for the given level."""
-    maze = Maze(20, 20)
-    pacman = PacMan((1, 1))
-    score = 0
-    ghosts = []
-    pacman_controlled = (level == 6)
-    
-    # Tạo ma quỷ trước
-    if level == 1:
-        ghosts.append(Ghost(maze, (10, 10), pacman.position, bfs, BLUE))
-    elif level == 2:
-        ghosts.append(Ghost(maze, (10, 10), pacman.position, dfs, PINK))
-    elif level == 3:
-        ghosts.append(Ghost(maze, (10, 10), pacman.position, ucs, ORANGE))
-    elif level == 4:
-        ghosts.append(Ghost(maze, (10, 10), pacman.position, a_star, RED))
-    elif level == 5:
-        ghosts.extend([
-            Ghost(maze, (10, 10), pacman.position, bfs, BLUE),
-            Ghost(maze, (10, 1), pacman.position, dfs, PINK),
-            Ghost(maze, (1, 10), pacman.position, ucs, ORANGE),
-            Ghost(maze, (5, 5), pacman.position, a_star, RED)
-        ])
-    elif level == 6:
-        ghosts.extend([
-            Ghost(maze, (10, 10), pacman.position, bfs, BLUE),
-            Ghost(maze, (10, 1), pacman.position, dfs, PINK),
-            Ghost(maze, (1, 10), pacman.position, ucs, ORANGE),
-            Ghost(maze, (5, 5), pacman.position, a_star, RED)
-        ])
-    
-    # Truyền danh sách ghosts vào mỗi Ghost để kiểm tra chồng nhau
-    for ghost in ghosts:
-        ghost.ghosts = ghosts
-        ghost.start()
-    
-    return maze, pacman, ghosts, score, pacman_controlled
+def initialize_game(level, shared_field=False, threaded=False, events=None, maze_file=None,
+                    cooperative=False, alt=False, record=None, profiler=None):
+    """Start a game engine for the given level.
+
+    The options are forwarded to Simulator (see create_ghosts for what they
+    do to the ghosts). Every game gets a fresh seed; with record, the game
+    is appended to that replay log.
+    """
+    sim = Simulator(level, shared_field=shared_field, threaded=threaded, events=events,
+                    maze_file=maze_file, cooperative=cooperative, alt=alt, profiler=profiler)
+    sim.reset(random.randrange(1 << 32))
+    if record:
+        sim.recorder = ReplayRecorder(record, sim, SIM_STEP)
+    return sim
 
 def main():
     """Main game loop for Pac-Man Search Algorithms."""
-    # Run performance tests if --test flag is provided
+    # Non-interactive benchmark over a process pool: --bench [bench.py trials options]
+    if '--bench' in sys.argv:
+        bench.main(['trials'] + sys.argv[sys.argv.index('--bench') + 1:])
+        sys.exit()
+
+    # Maze file (binary or ASCII layout) for the game and the tests: --maze FILE
+    maze_file = sys.argv[sys.argv.index('--maze') + 1] if '--maze' in sys.argv else None
+
+    # Run performance tests if --test flag is provided (windows only with --visualize)
     if '--test' in sys.argv:
-        maze = Maze(20, 20)
-        algorithms = {
-            'BFS': bfs,
-            'DFS': dfs,
-            'UCS': ucs,
-            'A*': a_star
-        }
-        results = run_tests(maze, algorithms)
+        maze = Maze.from_file(maze_file) if maze_file else Maze(20, 20)
+        algorithms = bench.test_algorithms()
+        bench.prepare_algorithms(maze, algorithms)
+        results = run_tests(maze, algorithms, visualize='--visualize' in sys.argv)
         print_results(results)
         pygame.quit()
         sys.exit()
 
+    # Ghosts of levels 5-6 share one distance map from Pac-Man (opt-in)
+    shared_field = '--shared-field' in sys.argv
+    # One thread per ghost instead of the tick scheduler (old behaviour)
+    threaded = '--threaded' in sys.argv
+    # Ghosts of levels 5-6 plan conflict-free paths together (not with --threaded)
+    cooperative = '--cooperative' in sys.argv
+    # A* ghosts use the landmark (ALT) heuristic instead of plain Manhattan distance
+    alt = '--alt' in sys.argv
+    # Ghost events stay in memory; --events FILE streams them to JSON Lines,
+    # --verbose also prints them and --debug-paths records every replanned path
+    verbose = '--verbose' in sys.argv
+    events = EventLog(level=DEBUG if verbose else INFO, echo=verbose,
+                      debug_paths='--debug-paths' in sys.argv)
+    if '--events' in sys.argv:
+        events.start_writer(sys.argv[sys.argv.index('--events') + 1])
+
+    # Append every game to a replay log (python replay.py play FILE); games
+    # with threaded ghosts depend on thread timing and cannot be replayed
+    record = sys.argv[sys.argv.index('--record') + 1] if '--record' in sys.argv else None
+    if record and threaded:
+        print("--record is ignored with --threaded")
+        record = None
+
+    # Time frames, updates and ghost searches: --profile shows the overlay
+    # (F3 toggles it), --trace FILE writes a Chrome trace on exit
+    trace = sys.argv[sys.argv.index('--trace') + 1] if '--trace' in sys.argv else None
+    profiler = Profiler() if '--profile' in sys.argv or trace else None
+    show_overlay = '--profile' in sys.argv
+    overlay = None  # Overlay lines, refreshed a few times per second
+    overlay_frame = 0
+
+    # Draw ghosts sliding between cells instead of jumping once per tick
+    interpolate = '--interpolate' in sys.argv
+
+    init_display()
+
     # Initialize game state
     current_level = 0  # 0 means level selection screen
-    maze = None
-    pacman = None
-    ghosts = []
-    score = 0
-    game_over = False
-    pacman_controlled = False
+    sim = None  # Game engine of the running level
     running = True
+    accumulator = 0.0  # Real time not yet simulated
+    pending_moves = deque()  # Pac-Man key presses, applied one per simulation step
+    level_keys = {pygame.K_1: 1, pygame.K_2: 2, pygame.K_3: 3,
+                  pygame.K_4: 4, pygame.K_5: 5, pygame.K_6: 6,
+                  pygame.K_7: 7, pygame.K_8: 8, pygame.K_9: 9}
+    move_keys = {pygame.K_UP: UP, pygame.K_DOWN: DOWN,
+                 pygame.K_LEFT: LEFT, pygame.K_RIGHT: RIGHT}
 
+    span = profiler.span if profiler else (lambda name: NO_SPAN)
     while running:
+        if profiler:
+            profiler.begin_frame()
         # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if current_level == 0:  # Level selection
-                    if event.key == pygame.K_1:
-                        current_level = 1
-                        maze, pacman, ghosts, score, pacman_controlled = initialize_game(1)
-                    elif event.key == pygame.K_2:
-                        current_level = 2
-                        maze, pacman, ghosts, score, pacman_controlled = initialize_game(2)
-                    elif event.key == pygame.K_3:
-                        current_level = 3
-                        maze, pacman, ghosts, score, pacman_controlled = initialize_game(3)
-                    elif event.key == pygame.K_4:
-                        current_level = 4
-                        maze, pacman, ghosts, score, pacman_controlled = initialize_game(4)
-                    elif event.key == pygame.K_5:
-                        current_level = 5
-                        maze, pacman, ghosts, score, pacman_controlled = initialize_game(5)
-                    elif event.key == pygame.K_6:
-                        current_level = 6
-                        maze, pacman, ghosts, score, pacman_controlled = initialize_game(6)
-                    elif event.key == pygame.K_q:
-                        running = False
-                elif game_over:  # Game over screen
-                    if event.key == pygame.K_r:
-                        current_level = 0
-                        game_over = False
-                        for ghost in ghosts:
-                            ghost.stop()
-                            ghost.join()
-                        ghosts = []
-                        maze = None
-                        pacman = None
-                        score = 0
-                        pacman_controlled = False
-                    elif event.key == pygame.K_q:
-                        running = False
-                else:  # In-game
-                    if event.key == pygame.K_q:
-                        # Return to level selection menu
-                        current_level = 0
-                        game_over = False
-                        for ghost in ghosts:
-                            ghost.stop()
-                            ghost.join()
-                        ghosts = []
-                        maze = None
-                        pacman = None
-                        score = 0
-                        pacman_controlled = False
-                    elif pacman_controlled:  # Pac-Man movement (level 6)
-                        old_position = pacman.position
-                        if event.key == pygame.K_UP:
-                            pacman.move((0, -1), maze)
-                        elif event.key == pygame.K_DOWN:
-                            pacman.move((0, 1), maze)
-                        elif event.key == pygame.K_LEFT:
-                            pacman.move((-1, 0), maze)
-                        elif event.key == pygame.K_RIGHT:
-                            pacman.move((1, 0), maze)
-                        # Check for eating dots
-                        if pacman.position in maze.dots:
-                            maze.dots.remove(pacman.position)
-                            score += 10
-                            if eat_dot_sound:
-                                eat_dot_sound.play()
-
-        # Update game state
+        with span('events'):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and profiler:
+                    show_overlay = not show_overlay
+                elif event.type == pygame.KEYDOWN:
+                    if current_level == 0:  # Level selection
+                        if event.key in level_keys:
+                            current_level = level_keys[event.key]
+                            sim = initialize_game(current_level, shared_field, threaded, events, maze_file,
+                                                  cooperative, alt, record, profiler)
+                        elif event.key == pygame.K_q:
+                            running = False
+                        accumulator = 0.0
+                        pending_moves.clear()
+                    elif sim.game_over:  # Game over screen
+                        if event.key == pygame.K_r:
+                            current_level = 0
+                            sim.close()
+                            sim = None
+                        elif event.key == pygame.K_q:
+                            running = False
+                    else:  # In-game
+                        if event.key == pygame.K_q:
+                            # Return to level selection menu
+                            current_level = 0
+                            sim.close()
+                            sim = None
+                        elif sim.pacman_controlled and event.key in move_keys:  # Pac-Man movement (level 6)
+                            pending_moves.append(move_keys[event.key])
+
+        # Update game state in fixed steps, however long the last frame took
+        if current_level != 0 and not sim.game_over:
+            while accumulator >= SIM_STEP and not sim.game_over:
+                accumulator -= SIM_STEP
+                # Ghosts chase Pac-Man; collisions are checked after every move
+                action = pending_moves.popleft() if pending_moves else None
+                with span('update'):
+                    ate = sim.update(SIM_STEP, action)
+                if ate and eat_dot_sound:
+                    eat_dot_sound.play()
+                if sim.game_over and game_over_sound:
+                    game_over_sound.play()
+
+        # Draw the current state
         if current_level == 0:
             draw_level_selection()
+        elif not sim.game_over:
+            # Overlay text is refreshed every 5 frames, not rendered every frame
+            if show_overlay and (overlay is None or overlay_frame % 5 == 0):
+                overlay = profiler_overlay(profiler, sim.ghosts)
+            elif not show_overlay:
+                overlay = None
+            overlay_frame += 1
+            ghost_from, alpha = sim.interpolation() if interpolate else (None, 1.0)
+            with span('draw'):
+                draw_maze(sim.maze, sim.pacman, sim.ghosts, sim.score, current_level, ghost_from, alpha,
+                          overlay)
         else:
-            if not game_over:
-                # Update ghost goals to chase Pac-Man
-                for ghost in ghosts:
-                    ghost.goal = pacman.position
-                # Check for collisions
-                for ghost in ghosts:
-                    if pacman.position == ghost.position:
-                        game_over = True
-                        if game_over_sound:
-                            game_over_sound.play()
-                        break
-                # Draw game
-                draw_maze(maze, pacman, ghosts, score, current_level)
-            else:
-                draw_game_over(score, current_level)
+            draw_game_over(sim.score, current_level)
+        if profiler:
+            profiler.end_frame()
 
-        # Control frame rate (20 FPS for level 6, 15 FPS for others)
+        # Control frame rate (20 FPS for level 6, 15 FPS for others); a very
+        # long frame (window dragged, debugger) is not simulated all at once
         if current_level == 6:
-            clock.tick(20)
+            accumulator += min(clock.tick(20) / 1000.0, MAX_FRAME_TIME)
         else:
-            clock.tick(15)
+            accumulator += min(clock.tick(15) / 1000.0, MAX_FRAME_TIME)
 
     # Clean up
-    for ghost in ghosts:
-        ghost.stop()
-        ghost.join()
+    if sim:
+        sim.close()
+    events.close()
+    print("Ghost events:", events.summary())
+    if profiler:
+        print("Profiler:", profiler.counters())
+        if trace:
+            print(f"{profiler.dump_chrome_trace(trace)} spans written to {trace}")
     pygame.quit()
     sys.exit()
 
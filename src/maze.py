@@ -1,105 +1,746 @@
+import argparse
+import bisect
+import itertools
+import random
+import struct
+import threading
 import numpy as np
+from array import array
 from collections import deque
 
+# Same order as get_valid_moves has always used: down, right, up, left
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+# Every grid (and every change to a grid) gets its own version number
+_versions = itertools.count()
+
+# From this many cells on, whole distance maps use the vectorized BFS
+# (below it the per-cell Python loop has less overhead)
+WAVEFRONT_MIN_CELLS = 10_000
+# Landmarks used by the ALT heuristic (a_star_alt in ghosts.py)
+LANDMARK_COUNT = 8
+# Grid changes remembered by Maze.changes_since (older ones force a full rebuild)
+MAX_LOGGED_CHANGES = 256
+# Exact BFSs a PairSampler may run per min_distance when its roots certify no pair
+PAIR_SAMPLER_SEARCHES = 16
+
+# Binary maze file: header (magic, format version, flags, width, height, ghost
+# count), then the spawns as int32 (x, y) pairs, Pac-Man first, then the wall
+# grid row by row with one bit per cell (np.packbits order)
+MAZE_MAGIC = b'PMAZ'
+MAZE_FORMAT = 1
+MAZE_HEADER = struct.Struct('<4sHHIII')
+
+# Classic ASCII layouts: '%' or '#' walls, '.' and 'o' dots, 'P' Pac-Man, 'G' ghosts
+ASCII_WALLS = '%#'
+ASCII_DOTS = '.o'
+
+def label_components(grid):
+    """Label 4-connected open regions of the grid with a vectorized union-find.
+
+    Returns an int array of the grid's shape where walls are -1 and every open
+    cell holds the smallest flat index of its component.
+    """
+    height, width = grid.shape
+    open_cells = grid.ravel() == 0
+    parent = np.arange(height * width, dtype=np.int32)
+
+    # Edges between horizontally and vertically adjacent open cells
+    right = open_cells[:-1] & open_cells[1:]
+    right[width - 1::width] = False
+    down = open_cells[:-width] & open_cells[width:]
+    a = np.concatenate((np.flatnonzero(right), np.flatnonzero(down)))
+    b = np.concatenate((np.flatnonzero(right) + 1, np.flatnonzero(down) + width))
+
+    while True:
+        root_a = parent[a]
+        root_b = parent[b]
+        differ = root_a != root_b
+        if not differ.any():
+            break
+        # Hook the larger root under the smaller one, then compress all chains
+        np.minimum.at(parent, np.maximum(root_a, root_b)[differ], np.minimum(root_a, root_b)[differ])
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+    labels = parent.reshape(height, width)
+    labels[grid != 0] = -1
+    return labels
+
+def wavefront_distances(grid, source, target=None):
+    """Vectorized BFS: distance in moves from source to every cell of grid.
+
+    Returns an int32 array of the grid's shape with -1 for walls and
+    unreachable cells. Each iteration expands the whole frontier at once:
+    the flat indices of the frontier are shifted by +-1 and +-row length on
+    a wall-padded copy of the grid and masked by the cells not reached yet.
+    With target, stops as soon as target has its distance. source may also
+    be a list of positions, giving the distance to the nearest of them.
+    """
+    height, width = grid.shape
+    row = width + 2
+    unvisited = np.pad(grid == 0, 1, constant_values=False).ravel()
+    dist = np.full(unvisited.size, -1, dtype=np.int32)
+    seen_by = np.zeros(unvisited.size, dtype=np.int32)
+    steps = np.array([1, -1, row, -row])
+    sources = source if isinstance(source, list) else [source]
+    starts = np.array([(y + 1) * row + x + 1 for x, y in sources], dtype=np.int64)
+    starts = np.unique(starts[unvisited[starts]]) if starts.size else starts
+    goal = None if target is None else (target[1] + 1) * row + target[0] + 1
+    if starts.size:
+        unvisited[starts] = False
+        dist[starts] = 0
+        frontier = starts
+        d = 0
+        while frontier.size and (goal is None or dist[goal] < 0):
+            d += 1
+            candidates = (frontier[:, None] + steps).ravel()
+            candidates = candidates[unvisited[candidates]]
+            # Keep one copy of cells reached from two frontier cells, without sorting
+            order = np.arange(1, candidates.size + 1, dtype=np.int32)
+            seen_by[candidates] = order
+            frontier = candidates[seen_by[candidates] == order]
+            unvisited[frontier] = False
+            dist[frontier] = d
+    return dist.reshape(height + 2, row)[1:-1, 1:-1]
+
+def path_from_distances(dist, goal):
+    """Positions from the distance map's source to goal, stepping down the map; None if unreachable"""
+    x, y = goal
+    height, width = dist.shape
+    if dist[y, x] < 0:
+        return None
+    path = [(x, y)]
+    while dist[y, x] > 0:
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and dist[ny, nx] == dist[y, x] - 1:
+                x, y = nx, ny
+                break
+        path.append((x, y))
+    return path[::-1]
+
+class Dots:
+    """Remaining dots as a boolean grid plus a count.
+
+    Membership and eating are O(1) whatever the maze size; iteration yields
+    (x, y) positions row by row. Eaten cells are remembered until the
+    renderer collects them with take_dirty().
+    """
+    def __init__(self, mask):
+        self.grid = mask
+        self.count = int(np.count_nonzero(mask))
+        self.dirty = set()
+
+    def __contains__(self, position):
+        x, y = position
+        height, width = self.grid.shape
+        return 0 <= x < width and 0 <= y < height and bool(self.grid[y, x])
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        ys, xs = np.nonzero(self.grid)
+        return zip(xs.tolist(), ys.tolist())
+
+    def eat(self, position):
+        """Remove the dot at position; returns True if there was one"""
+        if position not in self:
+            return False
+        x, y = position
+        self.grid[y, x] = False
+        self.count -= 1
+        self.dirty.add(position)
+        return True
+
+    def take_dirty(self):
+        """Cells whose dot was eaten since the last call"""
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+class RootDistances:
+    """Distances of the open cells to one root per component, for PairSampler.
+
+    The cells are sorted by (component, distance), so the cells of a component
+    within a distance range are one contiguous index range, found through a
+    table of where each distance starts.
+    """
+    def __init__(self, open_cells, component, starts, dist):
+        order = open_cells[np.lexsort((dist[open_cells], component[open_cells]))]
+        self.cells = order.tolist()
+        self.dist = dist.tolist()  # Distance to the root, by flat index
+        self.starts = starts
+        self.spreads = [self.dist[self.cells[end - 1]] for end in starts[1:]]  # Largest root distance
+        # first[offsets[c] + k]: index in cells of component c's first cell with r >= k
+        sizes = np.array(self.spreads, dtype=np.int64) + 2
+        self.offsets = np.r_[0, np.cumsum(sizes)[:-1]].tolist()
+        counts = np.bincount(np.array(self.offsets, dtype=np.int64)[component[order]] + dist[order] + 1,
+                             minlength=int(sizes.sum()))
+        self.first = np.cumsum(counts).tolist()
+        self._cumulative = {}  # min_distance -> running count of valid starts per component
+
+    def index(self, component, distance):
+        """Index in cells of the first cell of component at distance >= distance from its root"""
+        spread = self.spreads[component]
+        if distance <= 0:
+            return self.starts[component]
+        if distance > spread:
+            return self.starts[component + 1]
+        return self.first[self.offsets[component] + distance]
+
+    def has_goal(self, start, component, min_distance):
+        """True if the root distances alone put some cell min_distance from start"""
+        r = self.dist[start]
+        return r >= min_distance or r + min_distance <= self.spreads[component]
+
+    def start_ranges(self, component, min_distance):
+        """Index ranges of the cells of component that have a goal min_distance away"""
+        low = (self.starts[component], self.index(component, self.spreads[component] - min_distance + 1))
+        high = (self.index(component, min_distance), self.starts[component + 1])
+        if low[1] >= high[0]:
+            return [(low[0], high[1])]
+        return [low, high]
+
+    def goal_ranges(self, start, component, min_distance):
+        """Index ranges of the cells whose root distance differs from start's by min_distance"""
+        r = self.dist[start]
+        goals = []
+        if r >= min_distance:
+            goals.append((self.starts[component], self.index(component, r - min_distance + 1)))
+        if r + min_distance <= self.spreads[component]:
+            goals.append((self.index(component, r + min_distance), self.starts[component + 1]))
+        return goals
+
+    def valid_starts(self, min_distance):
+        """Running total of the valid starts over the components, cached per min_distance"""
+        cumulative = self._cumulative.get(min_distance)
+        if cumulative is None:
+            cumulative, total = [], 0
+            for component, spread in enumerate(self.spreads):
+                if spread >= min_distance:
+                    total += sum(end - begin for begin, end in self.start_ranges(component, min_distance))
+                cumulative.append(total)
+            self._cumulative[min_distance] = cumulative
+        return cumulative
+
+def nth_index(ranges, i):
+    """The i-th index of disjoint (begin, end) ranges"""
+    for begin, end in ranges:
+        if i < end - begin:
+            return begin + i
+        i -= end - begin
+
+class PairSampler:
+    """Random (start, goal) pairs that are connected and at least a given path distance apart.
+
+    Built once per grid: components are labeled and multi-source BFSs give
+    every cell's distance to two roots per component, the ends of a double
+    sweep. By the triangle inequality, two cells of a component are at least
+    |r(start) - r(goal)| moves apart for either root r, so the goals such a
+    difference certifies form at most two index ranges per root
+    (RootDistances). Drawing a pair is then a few random indices and no
+    search: the start is uniform over the cells with a certified goal and
+    the goal uniform over its certified goals. These are a subset of all
+    pairs that far apart.
+
+    Only when the roots certify no pair at all (min_distance close to the
+    diameter) do exact BFSs run, at most PAIR_SAMPLER_SEARCHES per
+    min_distance, from the cells with the largest eccentricity bound.
+    Each pair is then one of the first far-enough cell found and a cell far
+    enough from it.
+    """
+    def __init__(self, grid):
+        self.grid = grid
+        height, width = grid.shape
+        self.width = width
+        labels = label_components(grid).ravel()
+        open_cells = np.flatnonzero(labels >= 0)
+        # The label of a component is one of its cells
+        seeds = np.unique(labels[open_cells])
+        component = np.full(labels.size, -1, dtype=np.int64)
+        component[open_cells] = np.searchsorted(seeds, labels[open_cells])
+        starts = np.r_[0, np.cumsum(np.bincount(component[open_cells], minlength=seeds.size))].tolist()
+
+        def farthest(dist):
+            """Flat index of the farthest cell of every component from the sources of dist"""
+            order = open_cells[np.lexsort((dist[open_cells], component[open_cells]))]
+            return order[np.array(starts[1:], dtype=np.int64) - 1]
+
+        ends = farthest(wavefront_distances(grid, self.positions(seeds)).ravel())
+        from_a = wavefront_distances(grid, self.positions(ends)).ravel()
+        from_b = wavefront_distances(grid, self.positions(farthest(from_a))).ravel()
+        self.roots = [RootDistances(open_cells, component, starts, dist) for dist in (from_a, from_b)]
+        self.component = component.tolist()
+
+        # ecc(v) <= ecc(root) + d(root, v) bounds every cell's eccentricity
+        self.eccentricities = np.full(labels.size, -1, dtype=np.int64)
+        self.eccentricities[open_cells] = np.minimum(
+            *(np.array(root.spreads, dtype=np.int64)[component[open_cells]] + dist[open_cells]
+              for root, dist in zip(self.roots, (from_a, from_b))))
+        self.longest = max((max(spreads) for spreads in zip(*(root.spreads for root in self.roots))), default=-1)
+        self.far_pairs = {}  # min_distance -> (cell, cells that far from it) or why there is none
+
+    def positions(self, flat):
+        """(x, y) positions of flat (row-major) cell indices"""
+        return [(int(f) % self.width, int(f) // self.width) for f in flat]
+
+    def far_pair(self, min_distance):
+        """A cell with cells min_distance away from it (and those cells), by exact BFSs.
+
+        Searches from the cell with the largest eccentricity bound and lowers
+        the bounds with what each BFS finds, at most PAIR_SAMPLER_SEARCHES
+        times. Returns the error message instead if no such cell was found.
+        """
+        ecc = self.eccentricities
+        for _ in range(PAIR_SAMPLER_SEARCHES):
+            cell = int(np.argmax(ecc))
+            if ecc[cell] < min_distance:
+                return f"Maze has no connected cells {min_distance} moves apart"
+            dist = wavefront_distances(self.grid, self.positions([cell])[0]).ravel()
+            farthest = int(dist.max())
+            if farthest >= min_distance:
+                return cell, np.flatnonzero(dist >= min_distance).tolist()
+            reached = dist >= 0
+            ecc[reached] = np.minimum(ecc[reached], farthest + dist[reached])
+            self.longest = max(self.longest, farthest)
+        if ecc.max() < min_distance:
+            return f"Maze has no connected cells {min_distance} moves apart"
+        return (f"Found no connected cells {min_distance} moves apart in {PAIR_SAMPLER_SEARCHES} searches "
+                f"(the longest shortest path is {self.longest} to {int(ecc.max())} moves)")
+
+    def sample(self, min_distance, rng=random):
+        """One (start, goal) pair at least min_distance (>= 1) moves apart; ValueError if there is none"""
+        min_distance = max(min_distance, 1)
+        totals = [root.valid_starts(min_distance)[-1] if root.spreads else 0 for root in self.roots]
+        if not any(totals):
+            found = self.far_pairs.get(min_distance)
+            if found is None:
+                found = self.far_pairs[min_distance] = self.far_pair(min_distance)
+            if isinstance(found, str):
+                raise ValueError(found)
+            start, goals = found
+            goal = goals[rng.randrange(len(goals))]
+            if rng.randrange(2):
+                start, goal = goal, start
+            return tuple(self.positions([start, goal]))
+
+        # Uniform over the union of the roots' valid starts: draw from one
+        # root's, then keep the cell with 1 / (number of roots that have it)
+        while True:
+            i = rng.randrange(sum(totals))
+            for root, total in zip(self.roots, totals):
+                if i < total:
+                    break
+                i -= total
+            cumulative = root.valid_starts(min_distance)
+            component = bisect.bisect_right(cumulative, i)
+            i -= cumulative[component - 1] if component else 0
+            start = root.cells[nth_index(root.start_ranges(component, min_distance), i)]
+            if not rng.randrange(sum(r.has_goal(start, component, min_distance) for r in self.roots)):
+                break
+        # The goal the same way, over the union of the roots' goal ranges
+        ranges = [root.goal_ranges(start, component, min_distance) for root in self.roots]
+        sizes = [sum(end - begin for begin, end in goals) for goals in ranges]
+        while True:
+            i = rng.randrange(sum(sizes))
+            for root, goals, size in zip(self.roots, ranges, sizes):
+                if i < size:
+                    break
+                i -= size
+            goal = root.cells[nth_index(goals, i)]
+            if not rng.randrange(sum(abs(r.dist[start] - r.dist[goal]) >= min_distance for r in self.roots)):
+                return tuple(self.positions([start, goal]))
+
+    def pairs(self, count, min_distance, seed=None):
+        """count pairs from sample, reproducible with seed"""
+        rng = random.Random(seed)
+        return [self.sample(min_distance, rng) for _ in range(count)]
+
 class Maze:
-    def __init__(self, width=20, height=20):
+    PACMAN_SPAWN = (1, 1)
+    GHOST_SPAWNS = [(10, 10), (10, 1), (1, 10), (5, 5)]
+
+    def __init__(self, width=20, height=20, seed=None, pacman_spawn=None, ghost_spawns=None,
+                 grid=None, bits=None, dots=None, wall_chance=0.2):
+        """Generate a random maze, or wrap an existing grid (or bit-packed grid) with its spawns.
+        
+        wall_chance is the share of internal cells drawn as walls when generating.
+        bits is the row-major bit-packed wall grid of a file (usually an
+        np.memmap); it is only unpacked into grid when the whole grid is needed.
+        dots defaults to every open cell except the spawns.
+        """
         self.width = width
         self.height = height
-        self.grid = self.generate_maze()
-        self.dots = self.generate_dots()
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        if pacman_spawn is None:
+            pacman_spawn = self.PACMAN_SPAWN
+        if ghost_spawns is None:
+            ghost_spawns = [(x, y) for x, y in self.GHOST_SPAWNS
+                            if 0 < x < width - 1 and 0 < y < height - 1]
+        self.pacman_spawn = tuple(pacman_spawn)
+        self.ghost_spawns = [tuple(spawn) for spawn in ghost_spawns]
+        self.version = next(_versions)
+        self.changes = deque(maxlen=MAX_LOGGED_CHANGES)  # (old version, new version, cells or None)
+        self._adjacency = None
+        self._neighbors = None
+        self._open = None
+        self._field_key = None
+        self._field = None
+        self._field_lock = threading.Lock()
+        self._landmarks_key = None
+        self._landmarks = None
+        self._sampler_key = None
+        self._sampler = None
+        self._bits = bits
+        self._grid = grid
+        if grid is None and bits is None:
+            self._grid = self.generate_maze(wall_chance)
+        self._dots = dots
+    
+    @property
+    def grid(self):
+        """int8 array of shape (height, width), 1 for walls"""
+        if self._grid is None:
+            cells = np.unpackbits(self._bits, count=self.width * self.height)
+            self._grid = cells.reshape(self.height, self.width).astype(np.int8)
+        return self._grid
+    
+    @grid.setter
+    def grid(self, grid):
+        self._grid = grid
+        self.grid_changed()
+    
+    @property
+    def dots(self):
+        """Remaining dots, generated on first use"""
+        if self._dots is None:
+            self._dots = self.generate_dots()
+        return self._dots
+    
+    @dots.setter
+    def dots(self, dots):
+        self._dots = dots
+    
+    def save(self, path):
+        """Write the maze in the binary maze format (walls and spawns; dots are not stored)"""
+        spawns = np.array([self.pacman_spawn] + self.ghost_spawns, dtype='<i4')
+        with open(path, 'wb') as f:
+            f.write(MAZE_HEADER.pack(MAZE_MAGIC, MAZE_FORMAT, 0, self.width, self.height,
+                                     len(self.ghost_spawns)))
+            f.write(spawns.tobytes())
+            f.write(np.packbits(self.grid.ravel() != 0).tobytes())
+    
+    @classmethod
+    def load(cls, path):
+        """Open a binary maze file; the wall bits are memory-mapped, not read"""
+        with open(path, 'rb') as f:
+            magic, version, _, width, height, ghosts = MAZE_HEADER.unpack(f.read(MAZE_HEADER.size))
+            if magic != MAZE_MAGIC or version != MAZE_FORMAT:
+                raise ValueError(f"{path} is not a maze file (format {MAZE_FORMAT})")
+            spawns = np.frombuffer(f.read(8 * (ghosts + 1)), dtype='<i4').reshape(-1, 2).tolist()
+        bits = np.memmap(path, dtype=np.uint8, mode='r', offset=MAZE_HEADER.size + 8 * (ghosts + 1),
+                         shape=((width * height + 7) // 8,))
+        return cls(width, height, pacman_spawn=spawns[0], ghost_spawns=spawns[1:], bits=bits)
+    
+    @classmethod
+    def from_ascii(cls, text):
+        """Build a maze from a classic ASCII layout (see ASCII_WALLS and ASCII_DOTS).
+        
+        Short lines are padded with walls. Ghost spawns are listed row by row.
+        """
+        lines = [line.rstrip('\r') for line in text.split('\n')]
+        while lines and not lines[-1].strip():
+            lines.pop()
+        height, width = len(lines), max((len(line) for line in lines), default=0)
+        grid = np.ones((height, width), dtype=np.int8)
+        dots = np.zeros((height, width), dtype=bool)
+        pacman_spawn, ghost_spawns = None, []
+        for y, line in enumerate(lines):
+            for x, char in enumerate(line):
+                grid[y, x] = char in ASCII_WALLS
+                dots[y, x] = char in ASCII_DOTS
+                if char == 'P' and pacman_spawn is None:
+                    pacman_spawn = (x, y)
+                elif char == 'G':
+                    ghost_spawns.append((x, y))
+        if pacman_spawn is None:
+            raise ValueError("Layout has no Pac-Man spawn ('P')")
+        return cls(width, height, pacman_spawn=pacman_spawn, ghost_spawns=ghost_spawns,
+                   grid=grid, dots=Dots(dots))
+    
+    @classmethod
+    def from_file(cls, path):
+        """Open a binary maze file, or import an ASCII layout if the file is not one"""
+        with open(path, 'rb') as f:
+            binary = f.read(len(MAZE_MAGIC)) == MAZE_MAGIC
+        if binary:
+            return cls.load(path)
+        with open(path) as f:
+            return cls.from_ascii(f.read())
         
-    def generate_maze(self):
+    def generate_maze(self, wall_chance=0.2):
         """Generate a maze with walls around borders and random internal walls, ensuring paths from ghost positions to Pac-Man"""
-        grid = np.zeros((self.height, self.width))
+        spawns = [self.pacman_spawn] + self.ghost_spawns
         
-        # Border walls
+        # Draw all internal walls at once, keep the border closed and the spawns open
+        grid = (self.rng.random((self.height, self.width)) < wall_chance).astype(np.int8)
         grid[0, :] = 1
         grid[-1, :] = 1
         grid[:, 0] = 1
         grid[:, -1] = 1
+        for x, y in spawns:
+            grid[y, x] = 0
         
-        # Ghost starting positions
-        ghost_positions = [(10, 10), (10, 1), (1, 10), (5, 5)]
-        pacman_position = (1, 1)
-        
-        while True:
-            # Add random internal walls (20% of space), excluding Pac-Man's starting position (1,1)
-            for i in range(1, self.height-1):
-                for j in range(1, self.width-1):
-                    if (j, i) != (1, 1):  # Ensure (1,1) is not a wall
-                        if np.random.random() < 0.2:
-                            grid[i, j] = 1
-            
-            # Check if all ghost positions have a path to Pac-Man's position
-            all_paths_exist = True
-            for ghost_pos in ghost_positions:
-                if not self.has_path(grid, ghost_pos, pacman_position):
-                    all_paths_exist = False
-                    break
-            
-            if all_paths_exist:
-                break
-            
-            # If no path exists, clear internal walls and try again
-            grid[1:-1, 1:-1] = 0
+        # Label components once and repair every spawn cut off from Pac-Man
+        labels = label_components(grid)
+        px, py = self.pacman_spawn
+        for x, y in self.ghost_spawns:
+            if labels[y, x] != labels[py, px]:
+                self.carve_corridor(grid, (x, y), self.pacman_spawn)
         
         return grid
     
+    def carve_corridor(self, grid, start, goal):
+        """Clear an L-shaped corridor (horizontal, then vertical) from start to goal"""
+        (x1, y1), (x2, y2) = start, goal
+        grid[y1, min(x1, x2):max(x1, x2) + 1] = 0
+        grid[min(y1, y2):max(y1, y2) + 1, x2] = 0
+    
     def has_path(self, grid, start, goal):
-        """Use BFS to check if there is a path from start to goal in the grid"""
-        visited = set()
-        queue = deque([start])
-        visited.add(start)
-        
-        while queue:
-            x, y = queue.popleft()
-            if (x, y) == goal:
-                return True
-            
-            # Check four directions
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                new_x, new_y = x + dx, y + dy
-                if (0 <= new_x < self.width and 
-                    0 <= new_y < self.height and 
-                    grid[new_y, new_x] != 1 and 
-                    (new_x, new_y) not in visited):
-                    queue.append((new_x, new_y))
-                    visited.add((new_x, new_y))
-        
-        return False
+        """Check if there is a path from start to goal in the grid (vectorized BFS, stops at goal)"""
+        return wavefront_distances(grid, start, goal)[goal[1], goal[0]] >= 0
+    
+    def random_reachable_pair(self, min_distance, rng=random):
+        """Pick random start and goal cells that are connected and at least min_distance moves apart"""
+        return self.pair_sampler().sample(min_distance, rng)
+    
+    def pair_sampler(self):
+        """PairSampler of the grid, built on first use and cached until the grid changes"""
+        with self._field_lock:
+            if self._sampler_key != self.version:
+                self._sampler = PairSampler(self.grid)
+                self._sampler_key = self.version
+            return self._sampler
     
     def generate_dots(self):
         """Generate dots in all non-wall cells, excluding Pac-Man and ghost starting positions"""
-        dots = []
         # Exclude starting positions of Pac-Man and ghosts
-        excluded_positions = [(1, 1), (10, 10), (10, 1), (1, 10), (5, 5)]
-        
-        for y in range(self.height):
-            for x in range(self.width):
-                if not self.is_wall((x, y)) and (x, y) not in excluded_positions:
-                    dots.append((x, y))
-                    
-        return dots
+        free = self.grid == 0
+        for x, y in [self.pacman_spawn] + self.ghost_spawns:
+            free[y, x] = False
+        return Dots(free)
     
     def is_wall(self, position):
         x, y = position
         if x < 0 or x >= self.width or y < 0 or y >= self.height:
             return True
+        if self._grid is None:
+            # Read one bit of the memory-mapped file instead of unpacking the grid
+            i = y * self.width + x
+            return bool(self._bits[i >> 3] >> (7 - (i & 7)) & 1)
         return self.grid[y, x] == 1
     
+    def set_wall(self, position, wall=True):
+        """Add or remove a wall, invalidating everything derived from the grid (logged as a one-cell change)"""
+        x, y = position
+        self.grid[y, x] = 1 if wall else 0
+        self.grid_changed([position])
+    
+    def grid_changed(self, cells=None):
+        """Bump the grid version and drop the neighbor index so it gets rebuilt.
+        
+        Distance fields and landmark tables are keyed on the version, so they are recomputed too.
+        After editing only a few cells, pass their positions as cells: they are
+        logged so that HPA* planners can rebuild just the clusters around them.
+        """
+        previous = self.version
+        self.version = next(_versions)
+        self._adjacency = None
+        self._neighbors = None
+        self._open = None
+        self.changes.append((previous, self.version, None if cells is None else list(cells)))
+    
+    def changes_since(self, version):
+        """Cells edited since version, or None if the whole grid may have changed since"""
+        cells = []
+        if version == self.version:
+            return cells
+        for previous, _, changed in reversed(self.changes):
+            if changed is None:
+                return None
+            cells.extend(changed)
+            if previous == version:
+                return cells
+        return None
+    
+    def cell_id(self, position):
+        """Integer id of a cell, numbered column by column so ids sort like (x, y) tuples"""
+        x, y = position
+        return x * self.height + y
+    
+    def cell_position(self, cell):
+        """(x, y) position of an integer cell id"""
+        return divmod(cell, self.height)
+    
+    def adjacency(self):
+        """Return the (offsets, indices) neighbor index, building it on first use.
+        
+        The open neighbors of cell c are indices[offsets[c]:offsets[c + 1]],
+        listed in the same direction order as get_valid_moves.
+        """
+        if self._adjacency is None:
+            self._adjacency = self.build_adjacency()
+        return self._adjacency
+    
+    def neighbor_lists(self):
+        """Open neighbors of every cell as a list of lists indexed by cell id, built on first use.
+        
+        Same content as adjacency(), but iterating a list is several times
+        faster than slicing the CSR arrays, which matters for whole-maze BFS
+        on small mazes; large mazes use the vectorized BFS instead.
+        """
+        if self._neighbors is None:
+            offsets, indices = self.adjacency()
+            offsets, indices = offsets.tolist(), indices.tolist()
+            self._neighbors = [indices[start:end] for start, end in zip(offsets, offsets[1:])]
+        return self._neighbors
+    
+    def open_cells(self):
+        """bytearray indexed by cell id, 1 for open cells, built on first use"""
+        if self._open is None:
+            self._open = bytearray((self.grid.T == 0).tobytes())
+        return self._open
+    
+    def build_adjacency(self):
+        """Build the CSR neighbor index of the current grid in one vectorized pass"""
+        h, w = self.height, self.width
+        # Padded by hand: np.pad costs more than the rest on small mazes
+        padded_open = np.zeros((h + 2, w + 2), dtype=bool)
+        padded_open[1:-1, 1:-1] = self.grid == 0
+        padded_ids = np.full((h + 2, w + 2), -1, dtype=np.int32)
+        padded_ids[1:-1, 1:-1] = np.arange(h * w, dtype=np.int32).reshape(w, h).T
+        
+        # Rows ordered by cell id, i.e. column by column
+        neighbors = np.empty((w, h, len(DIRECTIONS)), dtype=np.int32)
+        for k, (dx, dy) in enumerate(DIRECTIONS):
+            window = (slice(1 + dy, 1 + dy + h), slice(1 + dx, 1 + dx + w))
+            neighbors[:, :, k] = np.where(padded_open[window], padded_ids[window], -1).T
+        neighbors = neighbors.reshape(h * w, len(DIRECTIONS))
+        valid = neighbors >= 0
+        offsets = np.zeros(h * w + 1, dtype=np.int32)
+        np.cumsum(valid.sum(axis=1), out=offsets[1:])
+        
+        # array.array keeps the index compact but yields plain ints when iterated
+        return array('i', offsets.tobytes()), array('i', neighbors[valid].tobytes())
+    
     def get_valid_moves(self, position):
         """Get all valid moves from current position"""
         x, y = position
-        moves = []
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return []
         
-        # Check four directions
-        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-            new_x, new_y = x + dx, y + dy
-            if 0 <= new_x < self.width and 0 <= new_y < self.height:
-                if not self.is_wall((new_x, new_y)):
-                    moves.append((new_x, new_y))
-                    
-        return moves
+        offsets, indices = self.adjacency()
+        cell = x * self.height + y
+        return [self.cell_position(n) for n in indices[offsets[cell]:offsets[cell + 1]]]
+    
+    def distance_map(self, source):
+        """BFS distance from source as an int32 array of shape (height, width), -1 = unreachable"""
+        return wavefront_distances(self.grid, source)
+    
+    def path_to(self, distances, goal):
+        """Shortest path from the source of a distance_map to goal, or None"""
+        return path_from_distances(distances, goal)
+    
+    def compute_distances(self, source):
+        """BFS distance (in moves) from source to every cell, as a flat list indexed by cell id (-1 = unreachable)"""
+        if self.width * self.height >= WAVEFRONT_MIN_CELLS:
+            # Transposed so the flat order is column by column, like cell ids
+            return self.distance_map(source).T.ravel().tolist()
+        neighbors = self.neighbor_lists()
+        dist = [-1] * (self.width * self.height)
+        start = self.cell_id(source)
+        dist[start] = 0
+        # Cells are appended while the list is iterated, in BFS order
+        queue = [start]
+        
+        for current in queue:
+            d = dist[current] + 1
+            for neighbor in neighbors[current]:
+                if dist[neighbor] < 0:
+                    dist[neighbor] = d
+                    queue.append(neighbor)
+        
+        return dist
+    
+    def distance_field(self, target):
+        """Shared distance map to target, recomputed lazily when the target or the grid changes.
+        
+        All ghosts chasing the same target read the same map, so one BFS per
+        Pac-Man move replaces one search per ghost.
+        """
+        key = (self.version, target)
+        with self._field_lock:
+            if self._field_key != key:
+                self._field = self.compute_distances(target)
+                self._field_key = key
+            return self._field
+    
+    def landmark_tables(self, count=LANDMARK_COUNT):
+        """Exact distances from count landmarks, built lazily and cached until the grid changes.
+        
+        Returns (landmarks, tables): the landmark cells and, for each, an
+        array('i') of distances indexed by cell id (-1 = unreachable). The
+        landmarks are picked farthest-first: the cell farthest from Pac-Man's
+        spawn, then each time the cell farthest from all landmarks so far,
+        which puts them on the edges of the maze where the bounds are tight.
+        """
+        key = (self.version, count)
+        with self._field_lock:
+            if self._landmarks_key != key:
+                self._landmarks = self.select_landmarks(count)
+                self._landmarks_key = key
+            return self._landmarks
+    
+    def select_landmarks(self, count):
+        """Farthest-point landmark selection; see landmark_tables"""
+        landmarks, tables = [], []
+        source = self.pacman_spawn
+        if self.is_wall(source):
+            open_cells = np.argwhere(self.grid == 0)
+            if not len(open_cells):
+                return landmarks, tables
+            source = (int(open_cells[0][1]), int(open_cells[0][0]))
+        nearest = self.distance_map(source)
+        for _ in range(count):
+            flat = int(np.argmax(nearest))
+            y, x = divmod(flat, self.width)
+            if nearest[y, x] <= 0 and landmarks:
+                break  # Every reachable cell is already a landmark
+            dist = self.distance_map((x, y))
+            landmarks.append((x, y))
+            # Transposed so the flat order is column by column, like cell ids
+            tables.append(array('i', dist.T.ravel().tobytes()))
+            # All landmarks share one component, so unreachable cells stay -1
+            nearest = np.minimum(nearest, dist) if len(landmarks) > 1 else dist
+        return landmarks, tables
+    
+    def next_step(self, position, target):
+        """Neighbor of position one move closer to target, or None if already there or unreachable"""
+        dist = self.distance_field(target)
+        offsets, indices = self.adjacency()
+        cell = self.cell_id(position)
+        d = dist[cell]
+        if d <= 0:
+            return None
+        for neighbor in indices[offsets[cell]:offsets[cell + 1]]:
+            if dist[neighbor] == d - 1:
+                return self.cell_position(neighbor)
+        return None
     
     def print_maze(self, pacman=None, ghosts=None):
         """Print maze to console (for debugging)"""
@@ -119,4 +760,28 @@ class Maze:
                     row.append('.')
                 else:
                     row.append(' ')
-            print(' '.join(row))
\ No newline at end of file
+            print(' '.join(row))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create binary maze files")
+    sub = parser.add_subparsers(dest='command', required=True)
+    generate = sub.add_parser('generate', help="save a random maze")
+    generate.add_argument('width', type=int)
+    generate.add_argument('height', type=int)
+    generate.add_argument('out')
+    generate.add_argument('--seed', type=int, default=None)
+    convert = sub.add_parser('convert', help="import an ASCII layout and save it")
+    convert.add_argument('layout')
+    convert.add_argument('out')
+    args = parser.parse_args(argv)
+    
+    if args.command == 'generate':
+        maze = Maze(args.width, args.height, seed=args.seed)
+    else:
+        maze = Maze.from_file(args.layout)
+    maze.save(args.out)
+    print(f"{args.out}: {maze.width}x{maze.height}, Pac-Man at {maze.pacman_spawn}, "
+          f"{len(maze.ghost_spawns)} ghost spawns")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Low-overhead profiler for the game loop and the ghost searches.
+
+Parts of a frame are timed with perf_counter_ns spans kept in a ring buffer,
+which can be written out as a Chrome trace (open it in chrome://tracing or
+https://ui.perfetto.dev) with one row per thread, so searches of threaded
+ghosts show up next to the main loop. Rolling counters (frame time
+percentiles, search time and expansions per ghost, replans per second) are
+available from counters() while the game runs.
+
+    profiler = Profiler()
+    profiler.begin_frame()
+    with profiler.span('draw'):
+        draw_maze(...)
+    profiler.end_frame()
+    print(profiler.counters())
+    profiler.dump_chrome_trace('trace.json')
+"""
+import json
+import os
+import threading
+from collections import deque
+from time import perf_counter_ns
+from ghosts import SearchStats
+
+class Span:
+    """Context manager timing one named part of the work; see Profiler.span."""
+    __slots__ = ('profiler', 'name', 'args', 'start')
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add_span(self.name, self.start, perf_counter_ns(), self.args)
+        return False
+
+class Profiler:
+    """Spans, frame times and per-ghost search counters.
+
+    capacity bounds the spans kept for the trace (oldest are dropped),
+    window is the number of recent frames the percentiles are taken over.
+    Spans may be added from any thread.
+    """
+    def __init__(self, capacity=200_000, window=300):
+        self.origin = perf_counter_ns()
+        self.spans = deque(maxlen=capacity)  # (name, thread id, start ns, end ns, args)
+        self.frames = deque(maxlen=window)   # Work time of recent frames in ns
+        self.frame_start = None
+        self.searches = {}      # ghost -> [searches, total ns, expansions]
+        self.replans = deque()  # End times of the searches of the last second
+        self.thread_names = {}  # Thread id -> name, for the trace
+        self.lock = threading.Lock()
+
+    def span(self, name, **args):
+        """Time a with-block as a span called name; args end up in the trace."""
+        return Span(self, name, args)
+
+    def add_span(self, name, start, end, args=None):
+        """Record a span measured elsewhere (perf_counter_ns start and end)."""
+        thread = threading.get_ident()
+        if thread not in self.thread_names:
+            self.thread_names[thread] = threading.current_thread().name
+        self.spans.append((name, thread, start, end, args))
+
+    def begin_frame(self):
+        """Mark the start of a frame's work."""
+        self.frame_start = perf_counter_ns()
+
+    def end_frame(self):
+        """Mark the end of a frame's work (before waiting for the next frame)."""
+        if self.frame_start is None:
+            return
+        end = perf_counter_ns()
+        self.frames.append(end - self.frame_start)
+        self.add_span('frame', self.frame_start, end)
+        self.frame_start = None
+
+    def search(self, ghost, algorithm, maze, start, goal):
+        """Run a ghost's search with a SearchStats attached and record its time and expansions."""
+        stats = SearchStats()
+        begin = perf_counter_ns()
+        path = algorithm(maze, start, goal, stats=stats)
+        self.record_search(ghost, begin, perf_counter_ns(), stats.expansions)
+        return path
+
+    def record_search(self, ghost, start, end, expansions):
+        """Count one search (replan) of ghost, any hashable label such as its color."""
+        with self.lock:
+            totals = self.searches.setdefault(ghost, [0, 0, 0])
+            totals[0] += 1
+            totals[1] += end - start
+            totals[2] += expansions
+            self.replans.append(end)
+        self.add_span('search', start, end, {'ghost': str(ghost), 'expansions': expansions})
+
+    def frame_percentiles(self, percentiles=(50, 95, 99)):
+        """Frame work time in ms at the given percentiles of the recent frames"""
+        frames = sorted(self.frames)
+        if not frames:
+            return {p: 0.0 for p in percentiles}
+        return {p: frames[min(len(frames) - 1, len(frames) * p // 100)] / 1e6 for p in percentiles}
+
+    def replans_per_second(self):
+        """Searches that ended within the last second"""
+        cutoff = perf_counter_ns() - 1_000_000_000
+        with self.lock:
+            while self.replans and self.replans[0] < cutoff:
+                self.replans.popleft()
+            return len(self.replans)
+
+    def counters(self):
+        """Snapshot of the rolling counters as a plain dict"""
+        with self.lock:
+            ghosts = {ghost: {'searches': count, 'avg_ms': total / count / 1e6,
+                              'avg_expanded': expanded / count}
+                      for ghost, (count, total, expanded) in self.searches.items()}
+        return {'frame_ms': self.frame_percentiles(), 'frames': len(self.frames),
+                'replans_per_s': self.replans_per_second(), 'ghosts': ghosts}
+
+    def dump_chrome_trace(self, path):
+        """Write the buffered spans as a Chrome trace JSON file; returns how many were written."""
+        pid = os.getpid()
+        spans = list(self.spans)
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread, 'args': {'name': name}}
+                  for thread, name in list(self.thread_names.items())]
+        for name, thread, start, end, args in spans:
+            event = {'name': name, 'ph': 'X', 'pid': pid, 'tid': thread,
+                     'ts': (start - self.origin) / 1000, 'dur': (end - start) / 1000}
+            if args:
+                event['args'] = args
+            events.append(event)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(spans)
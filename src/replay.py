@@ -0,0 +1,266 @@
+"""Compact binary replay logs: record games from the game loop, re-simulate them headless.
+
+Without ghost threads a game only depends on its level, options, seed and
+Pac-Man's action at every simulation step, so that is all a log needs; the
+ghost positions are stored too, to check that a replay did not diverge.
+A log file holds one game after another:
+
+    header   REPLAY_HEADER (magic, format, level, option flags, width, height,
+             seed, step length, ghost count, maze file name length), the
+             maze file name (UTF-8, empty for a generated maze) and the
+             ghosts' start positions as varint x, y pairs
+    records  one per step in which Pac-Man acted or a ghost moved: a varint
+             count of quiet steps before it, an event byte (bits 0-2: action,
+             0 for none or 1 + its index in ACTIONS; bit 3: ghosts moved),
+             and if ghosts moved one nibble per ghost (0 stayed, 1-4 moved
+             one cell in that ACTIONS direction, 5 jumped) followed by varint
+             x, y for every jump
+    end      a varint count of quiet steps and END
+
+Steps where nothing happens cost nothing, so a game takes well under a byte
+per step.
+
+    python replay.py info session.replay
+    python replay.py play session.replay [--game 0] [--seek STEP]
+"""
+import argparse
+import bisect
+import struct
+import time
+from simulator import Simulator, ACTIONS
+
+REPLAY_MAGIC = b'PREP'
+REPLAY_FORMAT = 1
+REPLAY_HEADER = struct.Struct('<4sHBBIIQdBH')
+END = 0xFF
+GHOSTS_MOVED = 0x08
+JUMP = 5
+# Option flags in the header
+SHARED_FIELD, COOPERATIVE, ALT, CACHE_PATHS = 1, 2, 4, 8
+
+def write_varint(data, value):
+    """Append an unsigned LEB128 varint to a bytearray"""
+    while value >= 0x80:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+
+def read_varint(data, offset):
+    """Decode the varint at offset; returns (value, next offset)"""
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+class ReplayRecorder:
+    """Records the steps of one game, appended to a log file when the game is closed.
+
+    Attach it to a seeded, unthreaded Simulator right after reset(); the
+    simulator then records every update() and closes the recorder in close().
+    """
+    def __init__(self, path, sim, dt):
+        if sim.threaded:
+            raise ValueError("Games with threaded ghosts cannot be replayed")
+        if sim.seed is None:
+            raise ValueError("Only games reset with a seed can be replayed")
+        self.path = path
+        self.sim = sim
+        flags = ((SHARED_FIELD if sim.shared_field else 0) | (COOPERATIVE if sim.cooperative else 0)
+                 | (ALT if sim.alt else 0) | (CACHE_PATHS if sim.path_cache is not None else 0))
+        name = (sim.maze_file or '').encode()
+        self.positions = [ghost.position for ghost in sim.ghosts]
+        self.data = bytearray(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_FORMAT, sim.level, flags,
+                                                 sim.width, sim.height, sim.seed, dt,
+                                                 len(self.positions), len(name)))
+        self.data += name
+        for x, y in self.positions:
+            write_varint(self.data, x)
+            write_varint(self.data, y)
+        self.quiet = 0  # Steps since the last record
+        self.steps = 0
+
+    def record(self, action):
+        """Record one step, after the simulator has applied action (or None)."""
+        self.steps += 1
+        positions = [ghost.position for ghost in self.sim.ghosts]
+        moved = positions != self.positions
+        if action is None and not moved:
+            self.quiet += 1
+            return
+        write_varint(self.data, self.quiet)
+        self.quiet = 0
+        self.data.append((0 if action is None else ACTIONS.index(action) + 1) | (GHOSTS_MOVED if moved else 0))
+        if moved:
+            codes, jumps = [], []
+            for (x0, y0), (x, y) in zip(self.positions, positions):
+                delta = (x - x0, y - y0)
+                if delta == (0, 0):
+                    codes.append(0)
+                elif delta in ACTIONS:
+                    codes.append(ACTIONS.index(delta) + 1)
+                else:
+                    codes.append(JUMP)
+                    jumps.append((x, y))
+            codes.append(0)  # Padding for an odd ghost count
+            self.data.extend(codes[i] | codes[i + 1] << 4 for i in range(0, len(codes) - 1, 2))
+            for x, y in jumps:
+                write_varint(self.data, x)
+                write_varint(self.data, y)
+            self.positions = positions
+
+    def close(self):
+        """End the game and append it to the log file; returns its size in bytes."""
+        write_varint(self.data, self.quiet)
+        self.data.append(END)
+        with open(self.path, 'ab') as f:
+            f.write(self.data)
+        return len(self.data)
+
+def read_games(path):
+    """Decode every game of a log file into a ReplayGame"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    games = []
+    offset = 0
+    while offset < len(data):
+        game = ReplayGame(data, offset)
+        games.append(game)
+        offset = game.end
+    return games
+
+class ReplayGame:
+    """One decoded game of a log: its header fields, actions and ghost positions by step."""
+    def __init__(self, data, offset=0):
+        start = offset
+        (magic, version, self.level, flags, self.width, self.height, self.seed, self.dt,
+         ghosts, name_length) = REPLAY_HEADER.unpack_from(data, offset)
+        if magic != REPLAY_MAGIC or version != REPLAY_FORMAT:
+            raise ValueError(f"Not a replay log (format {REPLAY_FORMAT}) at byte {offset}")
+        self.shared_field = bool(flags & SHARED_FIELD)
+        self.cooperative = bool(flags & COOPERATIVE)
+        self.alt = bool(flags & ALT)
+        self.cache_paths = bool(flags & CACHE_PATHS)
+        offset += REPLAY_HEADER.size
+        self.maze_file = data[offset:offset + name_length].decode() or None
+        offset += name_length
+        positions = []
+        for _ in range(ghosts):
+            x, offset = read_varint(data, offset)
+            y, offset = read_varint(data, offset)
+            positions.append((x, y))
+        self.start_positions = list(positions)
+
+        self.actions = {}  # step -> Pac-Man's action
+        self.ghosts = {}   # step -> ghost positions after that step, for the steps they moved
+        step = 0
+        while True:
+            quiet, offset = read_varint(data, offset)
+            step += quiet
+            event = data[offset]
+            offset += 1
+            if event == END:
+                break
+            if event & 0x07:
+                self.actions[step] = ACTIONS[(event & 0x07) - 1]
+            if event & GHOSTS_MOVED:
+                packed = data[offset:offset + (ghosts + 1) // 2]
+                offset += len(packed)
+                codes = [packed[i // 2] >> 4 * (i % 2) & 0x0F for i in range(ghosts)]
+                for i, code in enumerate(codes):
+                    if code == JUMP:
+                        x, offset = read_varint(data, offset)
+                        y, offset = read_varint(data, offset)
+                        positions[i] = (x, y)
+                    elif code:
+                        dx, dy = ACTIONS[code - 1]
+                        positions[i] = (positions[i][0] + dx, positions[i][1] + dy)
+                self.ghosts[step] = list(positions)
+            step += 1
+        self.steps = step
+        self.end = offset
+        self.size = offset - start
+
+    def ghost_positions(self, step):
+        """Recorded ghost positions after step (before step 0: the start positions)"""
+        steps = list(self.ghosts)  # Recorded in increasing order
+        i = bisect.bisect_right(steps, step)
+        return list(self.ghosts[steps[i - 1]]) if i else list(self.start_positions)
+
+class ReplayPlayer:
+    """Re-simulates a ReplayGame headless, checking the ghosts against the log.
+
+    seek(step) moves forward by simulating the steps in between and moves
+    backward by starting the game again from its seed.
+    """
+    def __init__(self, game, verify=True):
+        self.game = game
+        self.verify = verify
+        self.sim = None
+        self.step = 0
+        self.restart()
+
+    def restart(self):
+        """Start the recorded game again from step 0."""
+        game = self.game
+        if self.sim is not None:
+            self.sim.close()
+        self.sim = Simulator(game.level, game.width, game.height, shared_field=game.shared_field,
+                             cache_paths=game.cache_paths, maze_file=game.maze_file,
+                             cooperative=game.cooperative, alt=game.alt)
+        self.sim.reset(game.seed)
+        self.step = 0
+
+    def advance(self):
+        """Simulate the next recorded step; raises ValueError if the ghosts diverge from the log."""
+        self.sim.update(self.game.dt, self.game.actions.get(self.step))
+        expected = self.game.ghosts.get(self.step)
+        if self.verify and expected is not None:
+            positions = [ghost.position for ghost in self.sim.ghosts]
+            if positions != expected:
+                raise ValueError(f"Replay diverged at step {self.step}: ghosts at {positions}, "
+                                 f"log has {expected}")
+        self.step += 1
+
+    def seek(self, step):
+        """Go to the state after step steps (clamped to the game's length)."""
+        step = min(step, self.game.steps)
+        if step < self.step:
+            self.restart()
+        while self.step < step:
+            self.advance()
+        return self.sim.observation()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    info = sub.add_parser('info', help="games in a log with their size per step")
+    info.add_argument('log')
+    play = sub.add_parser('play', help="re-simulate a game and check it against the log")
+    play.add_argument('log')
+    play.add_argument('--game', type=int, default=0, help="index of the game in the log")
+    play.add_argument('--seek', type=int, default=None, help="stop after this step (default: the end)")
+    args = parser.parse_args(argv)
+
+    games = read_games(args.log)
+    if args.command == 'info':
+        print("Game | Level | Seed       | Steps  | Bytes | Bytes/step")
+        for i, game in enumerate(games):
+            print(f"{i:4} | {game.level:5} | {game.seed:10} | {game.steps:6} | {game.size:5} | "
+                  f"{game.size / max(game.steps, 1):10.3f}")
+    elif args.command == 'play':
+        game = games[args.game]
+        start_time = time.perf_counter()
+        player = ReplayPlayer(game)
+        observation = player.seek(game.steps if args.seek is None else args.seek)
+        elapsed = time.perf_counter() - start_time
+        player.sim.close()
+        print(f"Step {player.step}/{game.steps} in {elapsed:.2f} s "
+              f"({player.step / max(elapsed, 1e-9):.0f} steps/s), ghosts match the log")
+        print(observation)
+
+if __name__ == "__main__":
+    main()
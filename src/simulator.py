@@ -0,0 +1,295 @@
+"""Pygame-free game engine: maze, Pac-Man and ghosts advanced one tick at a time.
+
+The interactive game in main.py drives it from the pygame loop; batch
+rollouts use reset(seed) / step(action) directly:
+
+    sim = Simulator(level=5)
+    obs = sim.reset(seed=0)
+    while not obs['game_over']:
+        obs, score, done = sim.step(policy(obs))
+"""
+from collections import OrderedDict
+from contextlib import nullcontext
+from maze import Dots, Maze
+from pacman import PacMan
+from cooperative import CooperativePlanner
+from hpa import HierarchicalPlanner
+from ghosts import Ghost, GhostScheduler, IncrementalAStar, OccupancyGrid, PathCache, bfs, dfs, ucs, a_star, a_star_alt, bidirectional_bfs, jps, follow_field
+
+# Ghost colors (also used by main.py to pick the sprites)
+BLUE = (0, 0, 255)
+PINK = (255, 182, 193)
+ORANGE = (255, 165, 0)
+RED = (255, 0, 0)
+
+# Pac-Man actions
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+ACTIONS = [UP, DOWN, LEFT, RIGHT]
+
+DOT_SCORE = 10
+
+# Mazes a Simulator keeps for resets with a seed it has seen (or its maze file)
+MAZE_CACHE_SIZE = 16
+
+# Stands in for a profiler span when the game is not profiled
+NO_SPAN = nullcontext()
+
+def create_ghosts(level, maze, goal, shared_field=False, path_cache=None, alt=False):
+    """Create the ghosts of a level on the maze's ghost spawns.
+
+    With shared_field, the ghosts of levels 5 and 6 follow one distance map
+    from Pac-Man shared through the maze instead of each running its own search.
+    With a PathCache, the plain search functions are answered through it.
+    With alt, the A* ghosts use the landmark heuristic (a_star_alt).
+    Mazes with fewer ghost spawns than ghosts reuse them in turn.
+    """
+    if not maze.ghost_spawns:
+        raise ValueError("Maze has no ghost spawns")
+    spawns = [maze.ghost_spawns[i % len(maze.ghost_spawns)] for i in range(4)]
+    ghosts = []
+    if level == 1:
+        ghosts.append(Ghost(maze, spawns[0], goal, bfs, BLUE))
+    elif level == 2:
+        ghosts.append(Ghost(maze, spawns[0], goal, dfs, PINK))
+    elif level == 3:
+        ghosts.append(Ghost(maze, spawns[0], goal, ucs, ORANGE))
+    elif level == 4:
+        ghosts.append(Ghost(maze, spawns[0], goal, a_star, RED))
+    elif level == 5:
+        ghosts.extend([
+            Ghost(maze, spawns[0], goal, bfs, BLUE),
+            Ghost(maze, spawns[1], goal, dfs, PINK),
+            Ghost(maze, spawns[2], goal, ucs, ORANGE),
+            Ghost(maze, spawns[3], goal, a_star, RED)
+        ])
+    elif level == 6:
+        # Pac-Man moves on almost every key press here, so the A* ghost keeps
+        # its search tree between replans
+        ghosts.extend([
+            Ghost(maze, spawns[0], goal, bfs, BLUE),
+            Ghost(maze, spawns[1], goal, dfs, PINK),
+            Ghost(maze, spawns[2], goal, ucs, ORANGE),
+            Ghost(maze, spawns[3], goal, IncrementalAStar(), RED)
+        ])
+    elif level == 7:
+        ghosts.append(Ghost(maze, spawns[0], goal, bidirectional_bfs, BLUE))
+    elif level == 8:
+        ghosts.append(Ghost(maze, spawns[0], goal, jps, RED))
+    elif level == 9:
+        # Meant for large maze files: each replan refines only the first cluster of the path
+        ghosts.append(Ghost(maze, spawns[0], goal, HierarchicalPlanner(first_segment=True), ORANGE))
+
+    if alt:
+        for ghost in ghosts:
+            if ghost.algorithm is a_star:
+                ghost.algorithm = a_star_alt
+    if shared_field and level in (5, 6):
+        for ghost in ghosts:
+            ghost.algorithm = follow_field
+    elif path_cache is not None:
+        for ghost in ghosts:
+            if ghost.algorithm in (bfs, dfs, ucs, a_star, a_star_alt, bidirectional_bfs, jps):
+                # A suffix of a DFS path is not what DFS itself would return
+                ghost.algorithm = path_cache.wrap(ghost.algorithm, reuse_suffix=ghost.algorithm is not dfs)
+
+    # Truyền danh sách ghosts và bảng chiếm chỗ chung vào mỗi Ghost để kiểm tra chồng nhau
+    occupancy = OccupancyGrid(maze, ghosts)
+    for ghost in ghosts:
+        ghost.ghosts = ghosts
+        ghost.occupancy = occupancy
+    return ghosts
+
+class Simulator:
+    """Game state plus the rules that advance it, without any rendering.
+
+    Headless use calls step(action): one tick in which Pac-Man takes the
+    action (or stays for None) and, every ghost_interval ticks, every ghost
+    plans and moves once. The interactive game instead calls move_pacman()
+    on key presses and advance(dt) once per frame, which runs the ghost
+    scheduler on real time (or leaves the ghosts to their own threads).
+    Resetting with a seed seen in the last MAZE_CACHE_SIZE games (or with a
+    maze file) reuses that maze with fresh dots, so its neighbor index and
+    the path cache entries of the earlier games still apply.
+    """
+    def __init__(self, level=5, width=20, height=20, shared_field=False,
+                 ghost_interval=1, threaded=False, events=None, cache_paths=True, maze_file=None,
+                 cooperative=False, alt=False, profiler=None):
+        self.level = level
+        self.width = width
+        self.height = height
+        self.maze_file = maze_file  # Maze file (binary or ASCII) used instead of a random maze
+        # Levels 5-6: plan all ghosts together (WHCA*) instead of each ghost's own search
+        self.cooperative = cooperative
+        self.alt = alt  # A* ghosts use the landmark (ALT) heuristic
+        self.shared_field = shared_field
+        self.ghost_interval = ghost_interval
+        self.threaded = threaded
+        self.events = events  # EventLog shared by all ghosts (None: no logging)
+        self.profiler = profiler  # Profiler for update spans and ghost searches (None: not profiled)
+        self.pacman_controlled = (level == 6)
+        self.ghosts = []
+        self.seed = None
+        self.recorder = None  # ReplayRecorder of the current game (None: not recorded)
+        # Shared by all ghosts and kept across resets (keys include the maze version)
+        self.path_cache = PathCache() if cache_paths else None
+        self.mazes = OrderedDict()  # Seed or maze file -> (maze, its dots, its version), oldest first
+
+    def reset(self, seed=None):
+        """Start a new game; the same seed gives the same maze and ghost moves."""
+        self.close()
+        self.seed = seed
+        self.maze = self.new_maze(seed)
+        self.pacman = PacMan(self.maze.pacman_spawn)
+        self.ghosts = create_ghosts(self.level, self.maze, self.pacman.position,
+                                    self.shared_field, self.path_cache, self.alt)
+        for ghost in self.ghosts:
+            ghost.events = self.events
+            ghost.profiler = self.profiler
+        planner = CooperativePlanner() if self.cooperative and self.level in (5, 6) else None
+        self.scheduler = GhostScheduler(self.ghosts, seed=seed, planner=planner)
+        self.score = 0
+        self.ticks = 0
+        self.game_over = False
+        # Positions at the last collision check, to catch Pac-Man and a ghost swapping cells
+        self.last_positions = None
+        # Ghost positions before the last ghost tick, for interpolated rendering
+        self.ghost_from = [ghost.position for ghost in self.ghosts]
+        if self.threaded:
+            for ghost in self.ghosts:
+                ghost.start()
+        return self.observation()
+
+    def new_maze(self, seed):
+        """The maze of a new game with all its dots, reused from an earlier game when possible."""
+        key = self.maze_file or seed
+        cached = self.mazes.get(key) if key is not None else None
+        # A maze whose walls changed during its game is built again
+        if cached is None or cached[0].version != cached[2]:
+            if self.maze_file:
+                maze = Maze.from_file(self.maze_file)
+            else:
+                maze = Maze(self.width, self.height, seed=seed)
+            if key is None:
+                return maze
+            cached = self.mazes[key] = (maze, maze.dots.grid.copy(), maze.version)
+            if len(self.mazes) > MAZE_CACHE_SIZE:
+                self.mazes.popitem(last=False)
+        self.mazes.move_to_end(key)
+        maze, dots, _ = cached
+        maze.dots = Dots(dots.copy())
+        return maze
+
+    def close(self):
+        """Stop ghost threads (if they were started) and wait for them, and end the recording."""
+        for ghost in self.ghosts:
+            ghost.stop()
+            if ghost.is_alive():
+                ghost.join()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def move_pacman(self, direction):
+        """Move Pac-Man, eat the dot under him and check for a collision; returns True if a dot was eaten."""
+        if self.game_over:
+            return False
+        self.pacman.move(direction, self.maze)
+        ate = self.maze.dots.eat(self.pacman.position)
+        if ate:
+            self.score += DOT_SCORE
+        self.check_collision()
+        return ate
+
+    def update_goals(self):
+        """Point every ghost at Pac-Man's current position."""
+        for ghost in self.ghosts:
+            ghost.update_goal(self.pacman.position)
+
+    def check_collision(self):
+        """End the game if a ghost is on Pac-Man's cell or they swapped cells since the last check."""
+        pacman = self.pacman.position
+        positions = [ghost.position for ghost in self.ghosts]
+        last = self.last_positions
+        for i, position in enumerate(positions):
+            if position == pacman or (last and last[1][i] == pacman and position == last[0]):
+                self.game_over = True
+                break
+        self.last_positions = (pacman, positions)
+        return self.game_over
+
+    def span(self, name):
+        """Profiler span for one part of the update, or a no-op when not profiled."""
+        return self.profiler.span(name) if self.profiler is not None else NO_SPAN
+
+    def ghost_tick(self):
+        """Run one scheduler tick for all ghosts and check for a collision right after it."""
+        self.ghost_from = [ghost.position for ghost in self.ghosts]
+        with self.span('goals'):
+            self.update_goals()
+        with self.span('ghosts'):
+            self.scheduler.tick_once()
+        with self.span('collision'):
+            self.check_collision()
+
+    def advance(self, dt):
+        """Interactive update: run the ghost ticks due after dt seconds of real time.
+
+        Collisions are checked after every ghost tick, so a ghost passing
+        through Pac-Man is caught even when a slow frame runs several ticks.
+        Threaded ghosts move on their own; only the check is done here.
+        """
+        if self.game_over:
+            return
+        if self.threaded:
+            with self.span('goals'):
+                self.update_goals()
+            with self.span('collision'):
+                self.check_collision()
+            return
+        for _ in range(self.scheduler.due_ticks(dt)):
+            self.ghost_tick()
+            if self.game_over:
+                break
+
+    def update(self, dt, pacman_action=None):
+        """One fixed simulation step of dt seconds: Pac-Man's queued action, then the ghosts.
+
+        Returns True if Pac-Man ate a dot. With a recorder, the step is recorded.
+        """
+        ate = False
+        if pacman_action is not None:
+            ate = self.move_pacman(pacman_action)
+        self.advance(dt)
+        if self.recorder is not None:
+            self.recorder.record(pacman_action)
+        return ate
+
+    def interpolation(self):
+        """Ghost positions before the last tick and the fraction of the current tick elapsed."""
+        if self.threaded:
+            return [ghost.position for ghost in self.ghosts], 1.0
+        return self.ghost_from, self.scheduler.alpha()
+
+    def step(self, pacman_action=None):
+        """Headless update: advance one tick; returns (observation, score, game_over)."""
+        if not self.game_over:
+            if pacman_action is not None:
+                self.move_pacman(pacman_action)
+            if not self.game_over and self.ticks % self.ghost_interval == 0:
+                self.ghost_tick()
+            self.ticks += 1
+        return self.observation(), self.score, self.game_over
+
+    def observation(self):
+        """Snapshot of what a policy needs to choose Pac-Man's next action."""
+        return {
+            'tick': self.ticks,
+            'pacman': self.pacman.position,
+            'ghosts': [ghost.position for ghost in self.ghosts],
+            'dots_left': len(self.maze.dots),
+            'score': self.score,
+            'game_over': self.game_over,
+        }
@@ -1,8 +1,8 @@
 import random
 import time
-import psutil
-import os
+import tracemalloc
 import pygame
+from ghosts import SearchStats
 from collections import deque
 import numpy as np
 
@@ -14,26 +14,9 @@ GHOST_COLOR = (255, 0, 0)
 VISITED_COLOR = (200, 200, 255)
 EXPANDED_COLOR = (180, 255, 180)  # Color for expanded nodes visualization
 
-def generate_valid_positions(maze, min_distance):
+def generate_valid_positions(maze, min_distance, rng=random):
     """Generate random start and goal positions that are reachable and sufficiently far apart"""
-    while True:
-        # Get all walkable positions excluding borders and walls
-        walkable = []
-        for y in range(1, maze.height-1):
-            for x in range(1, maze.width-1):
-                if not maze.is_wall((x, y)):
-                    walkable.append((x, y))
-        
-        if len(walkable) < 2:
-            raise ValueError("Maze doesn't have enough walkable spaces")
-        
-        # Randomly select start and goal
-        start, goal = random.sample(walkable, 2)
-        
-        # Check Manhattan distance
-        distance = abs(start[0] - goal[0]) + abs(start[1] - goal[1])
-        if distance >= min_distance and maze.has_path(maze.grid, start, goal):
-            return start, goal
+    return maze.random_reachable_pair(min_distance, rng)
 
 def draw_test_case(maze, pacman_pos, ghost_pos, path=None, expanded=None):
     """Visualize the maze with optional path and expanded nodes"""
@@ -77,57 +60,45 @@ def draw_test_case(maze, pacman_pos, ghost_pos, path=None, expanded=None):
 
     pygame.display.flip()
 
-class NodeCounter:
-    """Helper class to track node expansions during search"""
-    def __init__(self):
-        self.count = 0
-        self.expanded_nodes = set()
-    
-    def increment(self, node):
-        self.count += 1
-        self.expanded_nodes.add(node)
-
 def measure_performance(algorithm, maze, start, goal):
     """
-    Measure algorithm performance with node expansion tracking
+    Measure algorithm performance with the search's built-in SearchStats
     Returns:
         dict: Performance metrics including expanded nodes count
     """
-    process = psutil.Process(os.getpid())
-    mem_before = process.memory_info().rss / 1024
+    # Timed run with counters; perf_counter_ns is not affected by clock changes
+    stats = SearchStats(record_expanded=True)
+    start_time = time.perf_counter_ns()
+    path = algorithm(maze, start, goal, stats=stats)
+    elapsed_ns = time.perf_counter_ns() - start_time
     
-    # Create counter for node expansions
-    counter = NodeCounter()
-    
-    # Create a wrapper around get_valid_moves to count expansions
-    original_get_moves = maze.get_valid_moves
-    def counting_get_moves(pos):
-        counter.increment(pos)
-        return original_get_moves(pos)
-    
-    # Temporarily replace the method
-    maze.get_valid_moves = counting_get_moves
-    
-    start_time = time.time()
-    path = algorithm(maze, start, goal)
-    elapsed = time.time() - start_time
-    mem_after = process.memory_info().rss / 1024
-    
-    # Restore original method
-    maze.get_valid_moves = original_get_moves
+    # Separate run for memory, because tracing allocations slows the search down
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    algorithm(maze, start, goal)
+    peak = tracemalloc.get_traced_memory()[1]
+    if not already_tracing:
+        tracemalloc.stop()
     
     return {
-        'time_ms': elapsed * 1000,
-        'memory_kb': mem_after - mem_before,
+        'time_ms': elapsed_ns / 1e6,
+        'memory_kb': (peak - baseline) / 1024,
         'path_length': len(path) if path else 0,
         'success': path is not None,
-        'expanded_nodes': counter.count,
+        'expanded_nodes': stats.expansions,
+        'pushes': stats.pushes,
+        'repushes': stats.repushes,
+        'peak_frontier': stats.peak_frontier,
+        'peak_visited': stats.peak_visited,
         'path': path,
-        'expanded_set': counter.expanded_nodes
+        'expanded_set': set(stats.expanded)
     }
 
-def run_tests(maze, algorithms, num_tests=5):
-    """Run randomized tests with visualization and node expansion tracking"""
+def run_tests(maze, algorithms, num_tests=5, visualize=False):
+    """Run randomized tests with node expansion tracking, shown in a pygame window if visualize is set"""
     # Calculate minimum distance based on maze size
     min_distance = (maze.width + maze.height) // 3
     
@@ -139,9 +110,10 @@ def run_tests(maze, algorithms, num_tests=5):
         print(f"🧪 From {start} to {goal}")
         
         # Show initial state
-        draw_test_case(maze, start, goal)
-        print("👉 Press any key to run algorithms...")
-        wait_for_keypress()
+        if visualize:
+            draw_test_case(maze, start, goal)
+            print("👉 Press any key to run algorithms...")
+            wait_for_keypress()
         
         result_table = []
         
@@ -154,11 +126,13 @@ def run_tests(maze, algorithms, num_tests=5):
                 'memory_kb': result['memory_kb'],
                 'path_length': result['path_length'],
                 'expanded_nodes': result['expanded_nodes'],
+                'peak_frontier': result['peak_frontier'],
+                'peak_visited': result['peak_visited'],
                 'success': result['success']
             })
             
             # Visualize expanded nodes and path
-            if result['success']:
+            if visualize and result['success']:
                 draw_test_case(maze, start, goal, result['path'], result['expanded_set'])
                 caption = (f"{name} (Path: {result['path_length']}, "
                          f"Expanded: {result['expanded_nodes']})")
@@ -166,13 +140,15 @@ def run_tests(maze, algorithms, num_tests=5):
                 time.sleep(1)
                 wait_for_keypress()
         
-        pygame.display.quit()
+        if visualize:
+            pygame.display.quit()
         
         # Print results table
-        print("\nAlgorithm | Time (ms) | Memory (KB) | Path Len | Expanded | Success")
+        print("\nAlgorithm | Time (ms) | Memory (KB) | Path Len | Expanded | Frontier | Visited | Success")
         for r in result_table:
             print(f"{r['name']:<9} | {r['time_ms']:8.2f} | {r['memory_kb']:10.2f} | "
-                  f"{r['path_length']:8} | {r['expanded_nodes']:8} | {r['success']}")
+                  f"{r['path_length']:8} | {r['expanded_nodes']:8} | {r['peak_frontier']:8} | "
+                  f"{r['peak_visited']:7} | {r['success']}")
     
     return all_results
 
@@ -204,6 +180,11 @@ def print_results(results):
         print(f"{algo:<9} | {data['avg_time']:8.2f} | {data['max_time']:8.2f} | "
               f"{data['avg_mem']:7.1f} | {data['avg_expanded']:12} | {data['max_expanded']:11} | "
               f"{data['success_rate']:6.1f}% | {data['avg_len']:7.2f}")
+    
+    # Landmark heuristic against plain Manhattan A* on the same tests
+    if 'A*' in stats and 'A* ALT' in stats and stats['A*']['avg_expanded']:
+        saved = 1 - stats['A* ALT']['avg_expanded'] / stats['A*']['avg_expanded']
+        print(f"\nA* ALT expands {saved:.1%} fewer nodes than A*")
 
 def wait_for_keypress():
     """Wait for any key press"""